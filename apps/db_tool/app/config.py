@@ -1,3 +1,6 @@
 import os
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 DB_PATH = os.getenv("DB_PATH", "/data/app.db")
+# Entries in route_date_min_price older than this are replaced by the next
+# saved fare for that route/day even if it is more expensive.
+MIN_PRICE_MAX_AGE_SECONDS = int(os.getenv("MIN_PRICE_MAX_AGE_SECONDS", "86400"))
@@ -1,4 +1,5 @@
 import sqlite3
+from travel_schemas.tool_schemas import CACHE_WARMER_TRIP_ID
 from .config import DB_PATH
 
 def get_conn():
@@ -27,6 +28,15 @@ def init_db():
       created_at TEXT DEFAULT (datetime('now'))
     );
 
+    CREATE INDEX IF NOT EXISTS idx_searches_trip_created
+      ON searches(trip_id, created_at);
+
+    CREATE INDEX IF NOT EXISTS idx_searches_created
+      ON searches(created_at);
+
+    CREATE INDEX IF NOT EXISTS idx_searches_query_hash_created
+      ON searches(query_hash, created_at);
+
     CREATE TABLE IF NOT EXISTS offers (
       offer_row_id INTEGER PRIMARY KEY AUTOINCREMENT,
       search_id TEXT NOT NULL,
@@ -34,6 +44,22 @@ def init_db():
       created_at TEXT DEFAULT (datetime('now'))
     );
 
+    CREATE INDEX IF NOT EXISTS idx_offers_search_id
+      ON offers(search_id);
+
+    -- Cheapest single-leg fare per route/day, maintained by save_offers.
+    CREATE TABLE IF NOT EXISTS route_date_min_price (
+      origin TEXT NOT NULL,
+      destination TEXT NOT NULL,
+      date TEXT NOT NULL,
+      currency TEXT NOT NULL,
+      min_price REAL NOT NULL,
+      offer_id TEXT NOT NULL,
+      search_id TEXT NOT NULL,
+      updated_at TEXT DEFAULT (datetime('now')),
+      PRIMARY KEY (origin, destination, currency, date)
+    ) WITHOUT ROWID;
+
     CREATE TABLE IF NOT EXISTS tool_calls (
       call_id INTEGER PRIMARY KEY AUTOINCREMENT,
       trace_id TEXT NOT NULL,
@@ -44,6 +70,27 @@ def init_db():
       status TEXT NOT NULL,
       created_at TEXT DEFAULT (datetime('now'))
     );
+
+    CREATE INDEX IF NOT EXISTS idx_tool_calls_trace_id
+      ON tool_calls(trace_id);
+
+    -- Sampled request profiles (collapsed stacks), one row per service per trace.
+    CREATE TABLE IF NOT EXISTS profiles (
+      profile_id INTEGER PRIMARY KEY AUTOINCREMENT,
+      trace_id TEXT NOT NULL,
+      service TEXT NOT NULL,
+      collapsed TEXT NOT NULL,
+      samples INTEGER NOT NULL,
+      duration_ms INTEGER NOT NULL,
+      created_at TEXT DEFAULT (datetime('now'))
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_profiles_trace_id
+      ON profiles(trace_id);
     """)
+    cur.execute(
+        "INSERT OR IGNORE INTO trips(trip_id, session_id, trip_type, status) VALUES (?, 'system', 'internal', 'internal')",
+        (CACHE_WARMER_TRIP_ID,),
+    )
     conn.commit()
     conn.close()
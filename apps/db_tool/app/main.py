@@ -1,34 +1,68 @@
 from __future__ import annotations
+import asyncio
+import itertools
 import json
 import uuid
-from fastapi import FastAPI
-from shared.logging import configure_logging, get_logger
+from typing import Any, Callable, Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from shared.http import etag_for, etag_matches
+from shared.logging import configure_logging, get_logger, bound_contextvars
+from shared.profiling import Profile, install_profiling
 from travel_schemas.tool_schemas import (
     ToolRegistryResponse, RegistryTool,
     SaveTripRequest, SaveTripResponse,
     SaveSearchRequest, SaveSearchResponse,
     SaveOffersRequest, GetTripResponse,
-    LogToolCallRequest
+    LogToolCallRequest,
+    LookupOffersRequest, LookupOffersResponse,
+    FareCalendarRequest, FareCalendarResponse, FareCalendarDay,
+    OfferPage, TraceStepPage,
+    PopularSearchesRequest, PopularSearchesResponse, PopularSearch,
+    SaveProfileRequest, GetProfileResponse, ProfileEntry,
 )
-from .config import LOG_LEVEL
+from .config import LOG_LEVEL, MIN_PRICE_MAX_AGE_SECONDS
 from .db import init_db, get_conn
+from .repository import (
+    InvalidCursor, decode_cursor, encode_cursor, iter_trace_steps, iter_trip_offers, project,
+)
 
 configure_logging(LOG_LEVEL)
 log = get_logger()
 
 app = FastAPI(title="DB Tool Server", version="v1")
 
+def _insert_profile(req: SaveProfileRequest) -> None:
+    conn = get_conn()
+    conn.execute(
+        "INSERT INTO profiles(trace_id, service, collapsed, samples, duration_ms) VALUES (?, ?, ?, ?, ?)",
+        (req.trace_id, req.service, req.collapsed, req.samples, req.duration_ms),
+    )
+    conn.commit()
+    conn.close()
+
+async def _store_own_profile(profile: Profile) -> None:
+    await asyncio.to_thread(_insert_profile, SaveProfileRequest(**profile.__dict__))
+
+install_profiling(app, "db_tool", _store_own_profile)
+
+@app.middleware("http")
+async def _bind_trace_id(request: Request, call_next):
+    # every log line emitted while serving a tool call carries the caller's trace_id
+    with bound_contextvars(trace_id=request.headers.get("x-trace-id")):
+        return await call_next(request)
+
 @app.on_event("startup")
 def _startup():
     init_db()
+    _init_registry()
     log.info("db_initialized")
 
 @app.get("/health")
 def health():
     return {"ok": True, "service": "db_tool"}
 
-@app.get("/tools/registry", response_model=ToolRegistryResponse)
-def registry():
+def _build_registry() -> ToolRegistryResponse:
     tools = [
         RegistryTool(
             name="save_trip",
@@ -60,9 +94,52 @@ def registry():
             input_schema={"type": "object", "properties": {"trip_id": {"type": "string"}}, "required": ["trip_id"]},
             output_schema=GetTripResponse.model_json_schema(),
         ),
+        RegistryTool(
+            name="lookup_offers",
+            description="Return the newest stored offers for a query_hash within a freshness window",
+            input_schema=LookupOffersRequest.model_json_schema(),
+            output_schema=LookupOffersResponse.model_json_schema(),
+            timeout_ms=1000,
+        ),
+        RegistryTool(
+            name="popular_searches",
+            description="Most frequent recent searches by query_hash, with the newest stored params",
+            input_schema=PopularSearchesRequest.model_json_schema(),
+            output_schema=PopularSearchesResponse.model_json_schema(),
+            timeout_ms=2000,
+        ),
+        RegistryTool(
+            name="save_profile",
+            description="Store a sampled request profile (collapsed stacks) for a trace",
+            input_schema=SaveProfileRequest.model_json_schema(),
+            output_schema={"type": "object", "properties": {"ok": {"type": "boolean"}}},
+        ),
+        RegistryTool(
+            name="get_fare_calendar",
+            description="Cheapest stored fare per day for a route over a date range",
+            input_schema=FareCalendarRequest.model_json_schema(),
+            output_schema=FareCalendarResponse.model_json_schema(),
+            timeout_ms=1000,
+        ),
     ]
     return ToolRegistryResponse(tools=tools)
 
+# Schemas only change with a deploy, so the registry is serialized once at startup.
+_registry_body: bytes = b""
+_registry_etag: str = ""
+
+def _init_registry() -> None:
+    global _registry_body, _registry_etag
+    _registry_body = _build_registry().model_dump_json().encode("utf-8")
+    _registry_etag = etag_for(_registry_body)
+
+@app.get("/tools/registry", response_model=ToolRegistryResponse)
+def registry(request: Request):
+    headers = {"ETag": _registry_etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), _registry_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=_registry_body, media_type="application/json", headers=headers)
+
 @app.post("/tools/save_trip", response_model=SaveTripResponse)
 def save_trip(req: SaveTripRequest):
     trip_id = str(uuid.uuid4())
@@ -87,18 +164,147 @@ def save_search(req: SaveSearchRequest):
     conn.close()
     return SaveSearchResponse(search_id=search_id)
 
+def _route_date_key(offer) -> Optional[tuple]:
+    """(origin, destination, date, currency) of a single-leg offer, or None if it cannot be indexed."""
+    if not isinstance(offer, dict):
+        return None
+    legs = offer.get("legs")
+    price = offer.get("price_total")
+    if not isinstance(legs, list) or len(legs) != 1 or not isinstance(legs[0], dict):
+        return None
+    if isinstance(price, bool) or not isinstance(price, (int, float)):
+        return None
+    leg = legs[0]
+    origin, destination, date = leg.get("origin"), leg.get("destination"), leg.get("date")
+    currency = offer.get("currency", "USD")
+    if not all(isinstance(v, str) and v for v in (origin, destination, date, currency)):
+        return None
+    return origin, destination, date, currency.upper()
+
+def _cheapest_per_route_date(offers: list) -> dict[tuple, dict]:
+    """
+    Cheapest offer per (origin, destination, date, currency) in a batch.
+    Only single-leg offers are indexed; multi-leg itineraries have no single
+    route/day to attribute their price to. Offers that do not have the
+    FlightOffer shape are stored but not indexed.
+    """
+    best: dict[tuple, dict] = {}
+    for offer in offers:
+        key = _route_date_key(offer)
+        if key is None:
+            continue
+        if key not in best or offer["price_total"] < best[key]["price_total"]:
+            best[key] = offer
+    return best
+
 @app.post("/tools/save_offers")
 def save_offers(req: SaveOffersRequest):
     conn = get_conn()
-    for offer in req.offers:
-        conn.execute(
-            "INSERT INTO offers(search_id, offer_json) VALUES (?, ?)",
-            (req.search_id, json.dumps(offer)),
-        )
-    conn.commit()
-    conn.close()
+    try:
+        for offer in req.offers:
+            conn.execute(
+                "INSERT INTO offers(search_id, offer_json) VALUES (?, ?)",
+                (req.search_id, json.dumps(offer)),
+            )
+        # Keep route_date_min_price current in the same transaction as the offers.
+        for (origin, destination, date, currency), offer in _cheapest_per_route_date(req.offers).items():
+            conn.execute(
+                "INSERT INTO route_date_min_price"
+                "(origin, destination, date, currency, min_price, offer_id, search_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(origin, destination, currency, date) DO UPDATE SET "
+                "min_price=excluded.min_price, offer_id=excluded.offer_id, "
+                "search_id=excluded.search_id, updated_at=datetime('now') "
+                "WHERE excluded.min_price < route_date_min_price.min_price "
+                "OR route_date_min_price.updated_at < datetime('now', ?)",
+                (origin, destination, date, currency, float(offer["price_total"]),
+                 str(offer.get("offer_id", "")), req.search_id,
+                 f"-{MIN_PRICE_MAX_AGE_SECONDS} seconds"),
+            )
+        conn.commit()
+    finally:
+        conn.close()
     return {"ok": True}
 
+@app.post("/tools/get_fare_calendar", response_model=FareCalendarResponse)
+def get_fare_calendar(req: FareCalendarRequest):
+    conn = get_conn()
+    # A single range scan over the route_date_min_price primary key.
+    rows = conn.execute(
+        "SELECT date, min_price, currency, offer_id, search_id, updated_at "
+        "FROM route_date_min_price "
+        "WHERE origin=? AND destination=? AND currency=? AND date BETWEEN ? AND ? "
+        "ORDER BY date",
+        (req.origin, req.destination, req.currency.upper(), req.date_from, req.date_to),
+    ).fetchall()
+    conn.close()
+    return FareCalendarResponse(
+        origin=req.origin,
+        destination=req.destination,
+        days=[FareCalendarDay(**dict(r)) for r in rows],
+    )
+
+@app.post("/tools/lookup_offers", response_model=LookupOffersResponse)
+def lookup_offers(req: LookupOffersRequest):
+    conn = get_conn()
+    # Served by idx_searches_query_hash_created; searches whose offers have not
+    # been written yet are skipped so a half-persisted search never counts as a hit.
+    search = conn.execute(
+        "SELECT s.search_id, s.created_at FROM searches s "
+        "WHERE s.query_hash=? AND s.created_at >= datetime('now', ?) "
+        "AND EXISTS (SELECT 1 FROM offers o WHERE o.search_id = s.search_id) "
+        "ORDER BY s.created_at DESC LIMIT 1",
+        (req.query_hash, f"-{req.max_age_seconds} seconds"),
+    ).fetchone()
+
+    if search is None:
+        conn.close()
+        return LookupOffersResponse(hit=False)
+
+    rows = conn.execute(
+        "SELECT offer_json FROM offers WHERE search_id=? ORDER BY offer_row_id",
+        (search["search_id"],),
+    ).fetchall()
+    conn.close()
+    return LookupOffersResponse(
+        hit=True,
+        search_id=search["search_id"],
+        created_at=search["created_at"],
+        offers=[json.loads(r["offer_json"]) for r in rows],
+    )
+
+@app.post("/tools/popular_searches", response_model=PopularSearchesResponse)
+def popular_searches(req: PopularSearchesRequest):
+    conn = get_conn()
+    # hits only count real demand (not exclude_provider rows). age follows
+    # lookup_offers: only searches whose offers were stored count, so a search
+    # whose save_offers failed is not mistaken for a fresh result.
+    top = conn.execute(
+        "SELECT s.query_hash, SUM(s.provider IS NOT ?) AS hits, "
+        "(SELECT CAST(strftime('%s', 'now') - strftime('%s', MAX(m.created_at)) AS INTEGER) "
+        " FROM searches m WHERE m.query_hash = s.query_hash "
+        " AND EXISTS (SELECT 1 FROM offers o WHERE o.search_id = m.search_id)) AS age_seconds "
+        "FROM searches s WHERE s.created_at >= datetime('now', ?) "
+        "GROUP BY s.query_hash HAVING hits > 0 ORDER BY hits DESC LIMIT ?",
+        (req.exclude_provider, f"-{req.window_seconds} seconds", req.limit),
+    ).fetchall()
+
+    searches = []
+    for row in top:
+        latest = conn.execute(
+            "SELECT trip_id, params_json FROM searches WHERE query_hash=? ORDER BY created_at DESC LIMIT 1",
+            (row["query_hash"],),
+        ).fetchone()
+        searches.append(PopularSearch(
+            query_hash=row["query_hash"],
+            trip_id=latest["trip_id"],
+            params_json=json.loads(latest["params_json"]),
+            hits=row["hits"],
+            age_seconds=row["age_seconds"],
+        ))
+    conn.close()
+    return PopularSearchesResponse(searches=searches)
+
 @app.post("/tools/log_tool_call")
 def log_tool_call(req: LogToolCallRequest):
     conn = get_conn()
@@ -110,6 +316,37 @@ def log_tool_call(req: LogToolCallRequest):
     conn.close()
     return {"ok": True}
 
+@app.post("/tools/save_profile")
+def save_profile(req: SaveProfileRequest):
+    _insert_profile(req)
+    return {"ok": True}
+
+@app.get("/tools/get_profile/{trace_id}", response_model=GetProfileResponse)
+def get_profile(trace_id: str, format: str = Query("json", pattern="^(json|collapsed)$")):
+    """
+    Profiles recorded for a trace. format=collapsed merges them into one
+    collapsed-stack document with the service as the root frame, ready for
+    flamegraph.pl or speedscope.
+    """
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT service, samples, duration_ms, collapsed, created_at "
+        "FROM profiles WHERE trace_id=? ORDER BY profile_id",
+        (trace_id,),
+    ).fetchall()
+    conn.close()
+
+    if format == "collapsed":
+        lines = [
+            f"{r['service']};{line}"
+            for r in rows
+            for line in r["collapsed"].splitlines()
+            if line
+        ]
+        return PlainTextResponse("\n".join(lines) + ("\n" if lines else ""))
+
+    return GetProfileResponse(trace_id=trace_id, profiles=[ProfileEntry(**dict(r)) for r in rows])
+
 @app.get("/tools/get_trip/{trip_id}", response_model=GetTripResponse)
 def get_trip(trip_id: str):
     conn = get_conn()
@@ -146,3 +383,99 @@ def get_trace(trace_id: str):
         "trace_id": trace_id,
         "steps": [dict(r) for r in rows],
     }
+
+def _split(csv: Optional[str]) -> Optional[list[str]]:
+    return [f.strip() for f in csv.split(",") if f.strip()] if csv else None
+
+def _invalid_cursor(e: InvalidCursor) -> HTTPException:
+    return HTTPException(status_code=400, detail={"error": "invalid_cursor", "message": str(e)})
+
+def _ndjson(conn, rows, render):
+    """Stream one JSON document per line; the connection closes when the stream ends."""
+    try:
+        for _, item in rows:
+            yield render(item) + "\n"
+    finally:
+        conn.close()
+
+def _keyset_read(
+    reader: Callable,
+    key: str,
+    cursor: Optional[str],
+    limit: int,
+    format: str,
+    to_record: Callable[[Any], dict],
+    render: Optional[Callable[[Any], str]] = None,
+):
+    """
+    Run a repository reader from `cursor`. With format=ndjson every remaining
+    item is streamed through `render` (default: JSON of `to_record`);
+    otherwise returns (records, next_cursor) for one page of `limit` items.
+    A cursor that does not decode or does not belong to `key` is a 400.
+    """
+    try:
+        after = decode_cursor(cursor)
+    except InvalidCursor as e:
+        raise _invalid_cursor(e)
+    conn = get_conn()
+    try:
+        it = reader(conn, key, after)
+        first = next(it, None)  # the reader validates the cursor on its first step
+    except InvalidCursor as e:
+        conn.close()
+        raise _invalid_cursor(e)
+    it = itertools.chain([first] if first else [], it)
+
+    if format == "ndjson":
+        render = render or (lambda item: json.dumps(to_record(item)))
+        return StreamingResponse(_ndjson(conn, it, render), media_type="application/x-ndjson")
+
+    page = list(itertools.islice(it, limit + 1))
+    conn.close()
+    next_cursor = encode_cursor(page[limit - 1][0]) if len(page) > limit else None
+    return [to_record(item) for _, item in page[:limit]], next_cursor
+
+@app.get("/tools/get_trip/{trip_id}/offers", response_model=OfferPage)
+def get_trip_offers(
+    trip_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="comma-separated offer fields to keep"),
+    exclude: Optional[str] = Query(None, description="comma-separated offer fields to drop, e.g. legs"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """
+    Keyset-paginated offers of a trip. With format=ndjson every offer after
+    `cursor` is streamed as one JSON line, read from SQLite incrementally.
+    """
+    fields_, exclude_ = _split(fields), _split(exclude)
+    # without a projection the stored JSON is streamed undecoded
+    render = None if fields_ or exclude_ else (lambda raw: raw)
+    result = _keyset_read(
+        iter_trip_offers, trip_id, cursor, limit, format,
+        lambda raw: project(json.loads(raw), fields_, exclude_), render,
+    )
+    if isinstance(result, StreamingResponse):
+        return result
+    offers, next_cursor = result
+    return OfferPage(offers=offers, next_cursor=next_cursor)
+
+@app.get("/tools/get_trace/{trace_id}/steps", response_model=TraceStepPage)
+def get_trace_steps(
+    trace_id: str,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description="comma-separated step fields to keep"),
+    exclude: Optional[str] = Query(None, description="comma-separated step fields to drop, e.g. output_json"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+):
+    """Keyset-paginated steps of a trace; format=ndjson streams every step after `cursor`."""
+    fields_, exclude_ = _split(fields), _split(exclude)
+    result = _keyset_read(
+        iter_trace_steps, trace_id, cursor, limit, format,
+        lambda step: project(step, fields_, exclude_),
+    )
+    if isinstance(result, StreamingResponse):
+        return result
+    steps, next_cursor = result
+    return TraceStepPage(trace_id=trace_id, steps=steps, next_cursor=next_cursor)
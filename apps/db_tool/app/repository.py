@@ -0,0 +1,109 @@
+"""
+Incremental (keyset) readers over trips and traces.
+
+Rows come straight off a SQLite cursor, so memory use does not depend on
+how many offers a trip has or how many steps a trace has. Positions are
+handed to clients as opaque cursor tokens.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import sqlite3
+from typing import Iterator, Optional, Sequence, Tuple
+
+_FETCH_CHUNK = 256
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: Optional[str]) -> Optional[dict]:
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        position = json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(str(e)) from e
+    if not isinstance(position, dict):
+        raise InvalidCursor("cursor must encode an object")
+    return position
+
+
+def _iter_cursor(cur: sqlite3.Cursor) -> Iterator[sqlite3.Row]:
+    while True:
+        rows = cur.fetchmany(_FETCH_CHUNK)
+        if not rows:
+            return
+        yield from rows
+
+
+def iter_trip_offers(
+    conn: sqlite3.Connection,
+    trip_id: str,
+    after: Optional[dict] = None,
+) -> Iterator[Tuple[dict, str]]:
+    """
+    Yield (position, offer_json) for every offer of a trip, ordered by search
+    (created_at, insertion order) then offer_row_id, starting after `after`.
+    """
+    search_ids = [
+        r["search_id"]
+        for r in conn.execute(
+            "SELECT search_id FROM searches WHERE trip_id=? ORDER BY created_at, rowid",
+            (trip_id,),
+        )
+    ]
+    start, after_row = 0, 0
+    if after is not None:
+        try:
+            start = search_ids.index(after["s"])
+            after_row = int(after["o"])
+        except (KeyError, ValueError, TypeError) as e:
+            raise InvalidCursor("cursor does not belong to this trip") from e
+
+    for search_id in search_ids[start:]:
+        cur = conn.execute(
+            "SELECT offer_row_id, offer_json FROM offers "
+            "WHERE search_id=? AND offer_row_id > ? ORDER BY offer_row_id",
+            (search_id, after_row),
+        )
+        for r in _iter_cursor(cur):
+            yield {"s": search_id, "o": r["offer_row_id"]}, r["offer_json"]
+        after_row = 0
+
+
+def iter_trace_steps(
+    conn: sqlite3.Connection,
+    trace_id: str,
+    after: Optional[dict] = None,
+) -> Iterator[Tuple[dict, dict]]:
+    """Yield (position, step) for a trace in call order, starting after `after`."""
+    try:
+        after_call = int(after["c"]) if after is not None else 0
+    except (KeyError, ValueError, TypeError) as e:
+        raise InvalidCursor("malformed trace cursor") from e
+    cur = conn.execute(
+        "SELECT call_id, tool_name, input_json, output_json, latency_ms, status, created_at "
+        "FROM tool_calls WHERE trace_id=? AND call_id > ? ORDER BY call_id",
+        (trace_id, after_call),
+    )
+    for r in _iter_cursor(cur):
+        step = dict(r)
+        yield {"c": step.pop("call_id")}, step
+
+
+def project(record: dict, fields: Optional[Sequence[str]], exclude: Optional[Sequence[str]]) -> dict:
+    """Keep only `fields` (if given) and drop `exclude` (if given)."""
+    if fields:
+        record = {k: record[k] for k in fields if k in record}
+    if exclude:
+        record = {k: v for k, v in record.items() if k not in exclude}
+    return record
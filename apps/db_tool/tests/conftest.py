@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from app import db
+from app.main import app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "app.db"))
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def trip_id(client):
+    return client.post("/tools/save_trip", json={"session_id": "s", "trip_type": "flight"}).json()["trip_id"]
@@ -0,0 +1,56 @@
+from app import db
+
+
+def _leg(date, origin="LHR", destination="DXB"):
+    return {"origin": origin, "destination": destination, "date": date}
+
+
+def _offer(offer_id, price, date="2025-06-15", **extra):
+    return {"offer_id": offer_id, "price_total": price, "currency": "USD", "legs": [_leg(date)], **extra}
+
+
+def _save(client, trip_id, offers):
+    search_id = client.post("/tools/save_search", json={
+        "trip_id": trip_id, "provider": "mock", "params_json": {}, "query_hash": "h",
+    }).json()["search_id"]
+    resp = client.post("/tools/save_offers", json={"search_id": search_id, "offers": offers})
+    assert resp.status_code == 200, resp.text
+    return search_id
+
+
+def _calendar(client):
+    return client.post("/tools/get_fare_calendar", json={
+        "origin": "LHR", "destination": "DXB", "date_from": "2025-06-01", "date_to": "2025-06-30",
+    }).json()["days"]
+
+
+def test_calendar_keeps_cheapest_fare_per_day(client, trip_id):
+    _save(client, trip_id, [_offer("a", 500), _offer("b", 420), _offer("c", 300, date="2025-06-16")])
+    _save(client, trip_id, [_offer("d", 450)])
+    days = {d["date"]: (d["offer_id"], d["min_price"]) for d in _calendar(client)}
+    assert days == {"2025-06-15": ("b", 420), "2025-06-16": ("c", 300)}
+
+
+def test_stale_entry_is_replaced_by_a_more_expensive_fare(client, trip_id):
+    _save(client, trip_id, [_offer("a", 300)])
+    conn = db.get_conn()
+    conn.execute("UPDATE route_date_min_price SET updated_at = datetime('now', '-2 days')")
+    conn.commit()
+    conn.close()
+    _save(client, trip_id, [_offer("b", 350)])
+    assert [(d["offer_id"], d["min_price"]) for d in _calendar(client)] == [("b", 350)]
+
+
+def test_offers_without_flight_offer_shape_are_stored_but_not_indexed(client, trip_id):
+    odd = [
+        {"legs": [{"from": "x"}], "price_total": 1},
+        {"legs": [_leg("2025-06-15")], "price_total": "cheap"},
+        {"legs": [_leg("2025-06-15")]},
+        {"legs": "LHR-DXB", "price_total": 5},
+        {"legs": [_leg("2025-06-15"), _leg("2025-06-20", "DXB", "LHR")], "price_total": 2},
+        {"legs": [_leg("2025-06-15")], "price_total": 3, "currency": None},
+    ]
+    _save(client, trip_id, odd + [_offer("ok", 400)])
+    assert [(d["offer_id"], d["min_price"]) for d in _calendar(client)] == [("ok", 400)]
+    page = client.get(f"/tools/get_trip/{trip_id}/offers", params={"limit": 50}).json()
+    assert len(page["offers"]) == len(odd) + 1
@@ -0,0 +1,16 @@
+from travel_schemas.tool_schemas import CACHE_WARMER_TRIP_ID
+
+
+def test_warmer_searches_stay_out_of_user_trips(client, trip_id):
+    client.post("/tools/save_search", json={
+        "trip_id": trip_id, "provider": "mock", "params_json": {}, "query_hash": "h",
+    })
+    client.post("/tools/save_search", json={
+        "trip_id": CACHE_WARMER_TRIP_ID, "provider": "cache_warmer", "params_json": {}, "query_hash": "h",
+    })
+    user = client.get(f"/tools/get_trip/{trip_id}").json()
+    assert [s["provider"] for s in user["searches"]] == ["mock"]
+
+    internal = client.get(f"/tools/get_trip/{CACHE_WARMER_TRIP_ID}").json()
+    assert internal["trip"]["trip_type"] == "internal"
+    assert [s["provider"] for s in internal["searches"]] == ["cache_warmer"]
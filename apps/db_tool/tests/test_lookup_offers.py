@@ -0,0 +1,59 @@
+from app import db
+
+OFFER = {
+    "offer_id": "o1", "airline": "EK", "price_total": 410.0, "currency": "USD",
+    "duration_minutes": 420, "stops": 0,
+    "legs": [{"origin": "LHR", "destination": "DXB", "date": "2025-06-15"}],
+}
+
+
+def _save_search(client, trip_id, query_hash, offers=(OFFER,)):
+    search_id = client.post("/tools/save_search", json={
+        "trip_id": trip_id, "provider": "mock", "params_json": {"q": query_hash}, "query_hash": query_hash,
+    }).json()["search_id"]
+    if offers:
+        client.post("/tools/save_offers", json={"search_id": search_id, "offers": list(offers)})
+    return search_id
+
+
+def _age(search_id, seconds):
+    conn = db.get_conn()
+    conn.execute(
+        "UPDATE searches SET created_at = datetime('now', ?) WHERE search_id=?",
+        (f"-{seconds} seconds", search_id),
+    )
+    conn.commit()
+    conn.close()
+
+
+def _lookup(client, query_hash, max_age_seconds=900):
+    return client.post(
+        "/tools/lookup_offers", json={"query_hash": query_hash, "max_age_seconds": max_age_seconds}
+    ).json()
+
+
+def test_hit_returns_newest_search_offers(client, trip_id):
+    old = _save_search(client, trip_id, "h1", [dict(OFFER, offer_id="old")])
+    _age(old, 120)
+    new = _save_search(client, trip_id, "h1")
+    body = _lookup(client, "h1")
+    assert body["hit"] is True
+    assert body["search_id"] == new
+    assert [o["offer_id"] for o in body["offers"]] == ["o1"]
+
+
+def test_miss_for_unknown_hash(client, trip_id):
+    _save_search(client, trip_id, "h1")
+    assert _lookup(client, "other") == {"hit": False, "search_id": None, "created_at": None, "offers": []}
+
+
+def test_searches_outside_the_freshness_window_are_ignored(client, trip_id):
+    search_id = _save_search(client, trip_id, "h1")
+    _age(search_id, 600)
+    assert _lookup(client, "h1", max_age_seconds=300)["hit"] is False
+    assert _lookup(client, "h1", max_age_seconds=900)["hit"] is True
+
+
+def test_search_without_offers_is_not_a_hit(client, trip_id):
+    _save_search(client, trip_id, "h1", offers=())
+    assert _lookup(client, "h1")["hit"] is False
@@ -0,0 +1,122 @@
+import json
+
+from app.repository import encode_cursor
+
+
+def _offer(i):
+    return {"offer_id": f"o{i}", "price_total": 100 + i, "currency": "USD", "legs": [{"n": i}]}
+
+
+def _save(client, trip_id, offers):
+    search_id = client.post("/tools/save_search", json={
+        "trip_id": trip_id, "provider": "mock", "params_json": {}, "query_hash": "h",
+    }).json()["search_id"]
+    client.post("/tools/save_offers", json={"search_id": search_id, "offers": offers})
+
+
+def _seed_offers(client, trip_id):
+    # three searches, one of them empty, so pages cross search boundaries
+    _save(client, trip_id, [_offer(i) for i in range(0, 4)])
+    _save(client, trip_id, [])
+    _save(client, trip_id, [_offer(i) for i in range(4, 7)])
+    return [f"o{i}" for i in range(7)]
+
+
+def _offers_url(trip_id):
+    return f"/tools/get_trip/{trip_id}/offers"
+
+
+def test_offer_pages_cover_every_offer_once(client, trip_id):
+    expected = _seed_offers(client, trip_id)
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = client.get(_offers_url(trip_id), params={"limit": 3, "cursor": cursor}).json()
+        seen += [o["offer_id"] for o in page["offers"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+    assert pages == 3
+
+
+def test_exact_final_page_has_no_next_cursor(client, trip_id):
+    _seed_offers(client, trip_id)
+    page = client.get(_offers_url(trip_id), params={"limit": 7}).json()
+    assert len(page["offers"]) == 7
+    assert page["next_cursor"] is None
+
+
+def test_cursor_from_another_trip_is_rejected(client, trip_id):
+    _seed_offers(client, trip_id)
+    other = client.post("/tools/save_trip", json={"session_id": "s2", "trip_type": "flight"}).json()["trip_id"]
+    _save(client, other, [_offer(9)])
+    cursor = client.get(_offers_url(trip_id), params={"limit": 2}).json()["next_cursor"]
+    resp = client.get(_offers_url(other), params={"cursor": cursor})
+    assert resp.status_code == 400
+    assert resp.json()["detail"]["error"] == "invalid_cursor"
+
+
+def test_garbage_cursor_is_rejected(client, trip_id):
+    _seed_offers(client, trip_id)
+    for cursor in ("not-a-cursor", encode_cursor([1, 2]), encode_cursor({"s": "unknown", "o": 0})):
+        resp = client.get(_offers_url(trip_id), params={"cursor": cursor})
+        assert resp.status_code == 400, cursor
+    resp = client.get("/tools/get_trace/t1/steps", params={"cursor": encode_cursor({"c": "x"})})
+    assert resp.status_code == 400
+
+
+def test_offer_projection(client, trip_id):
+    _seed_offers(client, trip_id)
+    page = client.get(_offers_url(trip_id), params={"limit": 1, "fields": "offer_id,price_total"}).json()
+    assert page["offers"] == [{"offer_id": "o0", "price_total": 100}]
+    page = client.get(_offers_url(trip_id), params={"limit": 1, "exclude": "legs"}).json()
+    assert page["offers"] == [{"offer_id": "o0", "price_total": 100, "currency": "USD"}]
+
+
+def test_offer_ndjson_passes_stored_json_through(client, trip_id):
+    expected = _seed_offers(client, trip_id)
+    resp = client.get(_offers_url(trip_id), params={"format": "ndjson"})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = resp.text.splitlines()
+    assert lines[0] == json.dumps(_offer(0))
+    assert [json.loads(line)["offer_id"] for line in lines] == expected
+
+
+def test_offer_ndjson_applies_projection_after_cursor(client, trip_id):
+    _seed_offers(client, trip_id)
+    cursor = client.get(_offers_url(trip_id), params={"limit": 5}).json()["next_cursor"]
+    resp = client.get(_offers_url(trip_id), params={"format": "ndjson", "fields": "offer_id", "cursor": cursor})
+    assert [json.loads(line) for line in resp.text.splitlines()] == [{"offer_id": "o5"}, {"offer_id": "o6"}]
+
+
+def _seed_steps(client, trace_id, n):
+    for i in range(n):
+        client.post("/tools/log_tool_call", json={
+            "trace_id": trace_id, "tool_name": f"tool{i}", "input_json": {"i": i},
+            "output_json": {"ok": True}, "latency_ms": i, "status": "ok",
+        })
+
+
+def test_trace_steps_page_by_call_id(client):
+    _seed_steps(client, "t1", 5)
+    _seed_steps(client, "t2", 2)
+    seen, cursor = [], None
+    while True:
+        page = client.get("/tools/get_trace/t1/steps", params={"limit": 2, "cursor": cursor}).json()
+        assert page["trace_id"] == "t1"
+        seen += [s["tool_name"] for s in page["steps"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"tool{i}" for i in range(5)]
+
+
+def test_trace_steps_projection_and_ndjson(client):
+    _seed_steps(client, "t1", 3)
+    page = client.get("/tools/get_trace/t1/steps", params={"exclude": "output_json,input_json"}).json()
+    assert set(page["steps"][0]) == {"tool_name", "latency_ms", "status", "created_at"}
+
+    resp = client.get("/tools/get_trace/t1/steps", params={"format": "ndjson", "fields": "tool_name"})
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in resp.text.splitlines()] == [{"tool_name": f"tool{i}"} for i in range(3)]
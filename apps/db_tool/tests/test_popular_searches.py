@@ -0,0 +1,66 @@
+from travel_schemas.tool_schemas import CACHE_WARMER_TRIP_ID
+
+from app import db
+
+
+def _search(client, trip_id, query_hash, provider="flight_tool", offers=({"offer_id": "o1"},), params=None):
+    search_id = client.post("/tools/save_search", json={
+        "trip_id": trip_id, "provider": provider, "params_json": params or {"q": query_hash}, "query_hash": query_hash,
+    }).json()["search_id"]
+    if offers:
+        client.post("/tools/save_offers", json={"search_id": search_id, "offers": list(offers)})
+    return search_id
+
+
+def _age(search_id, seconds):
+    conn = db.get_conn()
+    conn.execute(
+        "UPDATE searches SET created_at = datetime('now', ?) WHERE search_id=?", (f"-{seconds} seconds", search_id)
+    )
+    conn.commit()
+    conn.close()
+
+
+def _popular(client, **req):
+    return client.post("/tools/popular_searches", json={"exclude_provider": "cache_warmer", **req}).json()["searches"]
+
+
+def test_ranked_by_hits(client, trip_id):
+    for _ in range(3):
+        _search(client, trip_id, "a")
+    _search(client, trip_id, "b")
+    for _ in range(2):
+        _search(client, trip_id, "c")
+    top = _popular(client)
+    assert [(s["query_hash"], s["hits"]) for s in top] == [("a", 3), ("c", 2), ("b", 1)]
+    assert top[0]["params_json"] == {"q": "a"}
+    assert [s["query_hash"] for s in _popular(client, limit=2)] == ["a", "c"]
+
+
+def test_excluded_provider_is_not_demand_but_refreshes_age(client, trip_id):
+    user = _search(client, trip_id, "a")
+    _age(user, 800)
+    _search(client, CACHE_WARMER_TRIP_ID, "a", provider="cache_warmer")
+    _search(client, CACHE_WARMER_TRIP_ID, "warm-only", provider="cache_warmer")
+
+    [entry] = _popular(client)
+    assert (entry["query_hash"], entry["hits"]) == ("a", 1)
+    assert entry["age_seconds"] < 60
+
+
+def test_window_limits_what_counts(client, trip_id):
+    _age(_search(client, trip_id, "old"), 7200)
+    _search(client, trip_id, "new")
+    assert [s["query_hash"] for s in _popular(client, window_seconds=3600)] == ["new"]
+    assert {s["query_hash"] for s in _popular(client, window_seconds=86400)} == {"old", "new"}
+
+
+def test_age_ignores_searches_without_stored_offers(client, trip_id):
+    _age(_search(client, trip_id, "a"), 850)
+    _search(client, trip_id, "a", offers=())  # save_offers never happened
+    _search(client, trip_id, "b", offers=())
+
+    by_hash = {s["query_hash"]: s for s in _popular(client)}
+    assert by_hash["a"]["hits"] == 2
+    assert 850 <= by_hash["a"]["age_seconds"] < 900
+    assert by_hash["b"]["age_seconds"] is None
@@ -0,0 +1,14 @@
+def test_registry_serves_etag_and_304_on_match(client):
+    first = client.get("/tools/registry")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    names = {t["name"] for t in first.json()["tools"]}
+    assert {"save_offers", "lookup_offers", "get_fare_calendar"} <= names
+
+    again = client.get("/tools/registry", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert again.content == b""
+
+    assert client.get("/tools/registry", headers={"If-None-Match": f'W/{etag}, "other"'}).status_code == 304
+    assert client.get("/tools/registry", headers={"If-None-Match": '"stale"'}).status_code == 200
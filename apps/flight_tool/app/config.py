@@ -1,3 +1,14 @@
 import os
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# where sampled request profiles are stored
+DB_TOOL_URL = os.getenv("DB_TOOL_URL", "http://localhost:8002")
+
+# Synthetic fare inventory backing the mock provider (see inventory.py).
+# Pin INVENTORY_BASE_DATE for reproducible benchmarks; it defaults to today.
+INVENTORY_ENABLED = os.getenv("INVENTORY_ENABLED", "1") == "1"
+INVENTORY_PATH = os.getenv("INVENTORY_PATH", "/tmp/flight_inventory.bin")
+INVENTORY_SEED = int(os.getenv("INVENTORY_SEED", "42"))
+INVENTORY_BASE_DATE = os.getenv("INVENTORY_BASE_DATE", "")
+INVENTORY_DAYS = int(os.getenv("INVENTORY_DAYS", "365"))
+INVENTORY_FARES_PER_DAY = int(os.getenv("INVENTORY_FARES_PER_DAY", "64"))
@@ -0,0 +1,292 @@
+"""
+Deterministic synthetic fare inventory for the mock provider.
+
+Fares are generated for every ordered pair of airports in the route network
+and every day of a date window, then written once to a memory-mapped columnar
+file:
+
+    header | airport codes | bucket offsets (uint32) | price in cents (uint32)
+           | duration_minutes (uint16) | stops (uint8) | airline (uint8)
+
+A bucket is one (origin, destination, day); its fares are contiguous and
+sorted by price, and `offsets[b]:offsets[b + 1]` is its slice of every column.
+Prices are whole cents, so a max_price cut is exact at the displayed price.
+The same seed and parameters always produce a byte-identical file.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import heapq
+import math
+import mmap
+import os
+import random
+import struct
+import tempfile
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+MAGIC = b"ITPINV02"
+_HEADER = struct.Struct("<8sIIIIII")  # magic, seed, n_airports, n_days, fares_per_day, base_ordinal, n_fares
+
+AIRLINES = ("AI", "EK", "BA", "LH", "AF", "QR", "EY", "UA", "DL", "VS")
+
+# lat, lon of the airports location_resolver knows about
+AIRPORT_COORDS: Dict[str, Tuple[float, float]] = {
+    "CDG": (49.01, 2.55),
+    "ORY": (48.73, 2.36),
+    "LHR": (51.47, -0.45),
+    "LGW": (51.15, -0.19),
+    "JFK": (40.64, -73.78),
+    "EWR": (40.69, -74.17),
+    "LGA": (40.78, -73.87),
+    "HYD": (17.24, 78.43),
+    "DXB": (25.25, 55.36),
+}
+
+
+def _distance_km(a: str, b: str) -> float:
+    (lat1, lon1), (lat2, lon2) = AIRPORT_COORDS[a], AIRPORT_COORDS[b]
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    h = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * 6371.0 * math.asin(math.sqrt(h))
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def generate(
+    path: str,
+    seed: int,
+    base_date: dt.date,
+    n_days: int,
+    fares_per_day: int,
+    airports: Sequence[str] = tuple(AIRPORT_COORDS),
+) -> None:
+    """Write the inventory file for these parameters (atomically)."""
+    rng = random.Random(seed)
+    n_airports = len(airports)
+    offsets = array("I", [0])
+    price, duration, stops, airline = array("I"), array("H"), array("B"), array("B")
+
+    for o in range(n_airports):
+        for d in range(n_airports):
+            if o == d:
+                offsets.extend([len(price)] * n_days)
+                continue
+            km = _distance_km(airports[o], airports[d])
+            base_fare = 60.0 + 0.09 * km
+            base_minutes = 40 + km / 13.5  # ~810 km/h block speed
+            for day in range(n_days):
+                date = base_date + dt.timedelta(days=day)
+                season = 1.0 + 0.18 * math.sin(2 * math.pi * date.timetuple().tm_yday / 365.0)
+                weekend = 1.12 if date.weekday() >= 4 else 1.0
+                bucket = []
+                for _ in range(fares_per_day):
+                    n_stops = rng.choices((0, 1, 2), weights=(40, 45, 15))[0]
+                    fare = base_fare * season * weekend * rng.lognormvariate(0.0, 0.35)
+                    fare *= (1.0, 0.82, 0.7)[n_stops]
+                    minutes = base_minutes + n_stops * rng.randint(75, 300)
+                    bucket.append((round(fare * 100), min(int(minutes), 65535), n_stops, rng.randrange(len(AIRLINES))))
+                bucket.sort()
+                for f, m, s, a in bucket:
+                    price.append(f)
+                    duration.append(m)
+                    stops.append(s)
+                    airline.append(a)
+                offsets.append(len(price))
+
+    header = _HEADER.pack(MAGIC, seed, n_airports, n_days, fares_per_day, base_date.toordinal(), len(price))
+    codes = "".join(airports).encode("ascii")
+
+    # a private temp file per writer: concurrent workers each build their own
+    # and the last rename wins (the contents are identical)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(codes)
+            for col in (offsets, price, duration, stops, airline):
+                f.write(b"\0" * (_align(f.tell()) - f.tell()))
+                col.tofile(f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _max_cents(max_price: float) -> int:
+    """Largest whole-cent price within `max_price` (tolerant of float noise like 412.37 * 100)."""
+    return math.floor(round(max_price * 100, 6))
+
+
+@dataclass(frozen=True)
+class Fare:
+    index: int
+    origin: str
+    destination: str
+    date: str
+    price_cents: int
+    duration_minutes: int
+    stops: int
+    airline: str
+
+    @property
+    def price(self) -> float:
+        return self.price_cents / 100
+
+
+class Inventory:
+    """Read-only view over an inventory file; columns are memoryviews into the mmap."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mm)
+
+        magic, self.seed, n_airports, self.n_days, self.fares_per_day, base_ordinal, n_fares = \
+            _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not an inventory file")
+        self.base_date = dt.date.fromordinal(base_ordinal)
+        self.n_fares = n_fares
+
+        pos = _HEADER.size
+        codes = bytes(buf[pos:pos + 3 * n_airports]).decode("ascii")
+        self.airports = [codes[i:i + 3] for i in range(0, len(codes), 3)]
+        self._airport_idx = {c: i for i, c in enumerate(self.airports)}
+        pos += 3 * n_airports
+
+        def column(fmt: str, length: int) -> memoryview:
+            nonlocal pos
+            pos = _align(pos)
+            size = array(fmt).itemsize * length
+            col = buf[pos:pos + size].cast(fmt)
+            pos += size
+            return col
+
+        self.offsets = column("I", n_airports * n_airports * self.n_days + 1)
+        self.price_cents = column("I", n_fares)
+        self.duration = column("H", n_fares)
+        self.stops = column("B", n_fares)
+        self.airline = column("B", n_fares)
+
+    def matches(self, seed: int, base_date: dt.date, n_days: int, fares_per_day: int) -> bool:
+        return (self.seed, self.base_date, self.n_days, self.fares_per_day) == (seed, base_date, n_days, fares_per_day)
+
+    def close(self) -> None:
+        for col in (self.offsets, self.price_cents, self.duration, self.stops, self.airline):
+            col.release()
+        self._mm.close()
+        self._file.close()
+
+    def _bucket(self, origin: str, destination: str, date: str) -> Optional[Tuple[int, int]]:
+        o = self._airport_idx.get(origin)
+        d = self._airport_idx.get(destination)
+        if o is None or d is None or o == d:
+            return None
+        try:
+            day = (dt.date.fromisoformat(date) - self.base_date).days
+        except ValueError:
+            return None
+        if not 0 <= day < self.n_days:
+            return None
+        b = (o * len(self.airports) + d) * self.n_days + day
+        return self.offsets[b], self.offsets[b + 1]
+
+    def covers(self, origin: str, destination: str, date: str) -> bool:
+        return self._bucket(origin, destination, date) is not None
+
+    def search_leg(
+        self,
+        origin: str,
+        destination: str,
+        date: str,
+        max_stops: int,
+        max_price: Optional[float],
+        limit: int,
+    ) -> List[Fare]:
+        """Cheapest fares for one leg, ascending by price."""
+        bounds = self._bucket(origin, destination, date)
+        if bounds is None:
+            return []
+        lo, hi = bounds
+        if max_price is not None:
+            # bucket is price-sorted: cut the tail with a binary search
+            hi = bisect_right(self.price_cents, _max_cents(max_price), lo, hi)
+        out: List[Fare] = []
+        stops, price, duration, airline = self.stops, self.price_cents, self.duration, self.airline
+        for i in range(lo, hi):
+            if stops[i] > max_stops:
+                continue
+            out.append(Fare(i, origin, destination, date, price[i],
+                            duration[i], stops[i], AIRLINES[airline[i]]))
+            if len(out) >= limit:
+                break
+        return out
+
+    def search(
+        self,
+        legs: Sequence[Tuple[str, str, str]],
+        max_stops: int,
+        max_price: Optional[float],
+        limit: int,
+    ) -> List[List[Fare]]:
+        """
+        Cheapest itineraries (one fare per leg), ascending by total price.
+        Multi-leg results are the k cheapest combinations of per-leg fares.
+        """
+        per_leg = [self.search_leg(o, d, day, max_stops, max_price, limit) for o, d, day in legs]
+        if any(not fares for fares in per_leg):
+            return []
+        if len(per_leg) == 1:
+            return [[f] for f in per_leg[0]]
+
+        max_cents = _max_cents(max_price) if max_price is not None else None
+
+        def total(idx: Tuple[int, ...]) -> int:
+            return sum(per_leg[leg][i].price_cents for leg, i in enumerate(idx))
+
+        start = (0,) * len(per_leg)
+        heap = [(total(start), start)]
+        seen = {start}
+        out: List[List[Fare]] = []
+        while heap and len(out) < limit:
+            cost, idx = heapq.heappop(heap)
+            if max_cents is not None and cost > max_cents:
+                break
+            out.append([per_leg[leg][i] for leg, i in enumerate(idx)])
+            for leg in range(len(idx)):
+                nxt = idx[:leg] + (idx[leg] + 1,) + idx[leg + 1:]
+                if nxt[leg] < len(per_leg[leg]) and nxt not in seen:
+                    seen.add(nxt)
+                    heapq.heappush(heap, (total(nxt), nxt))
+        return out
+
+
+def load_or_generate(
+    path: str,
+    seed: int,
+    base_date: dt.date,
+    n_days: int,
+    fares_per_day: int,
+) -> Inventory:
+    """Open the inventory at `path`, regenerating it if missing or built with other parameters."""
+    if os.path.exists(path):
+        try:
+            inv = Inventory(path)
+            if inv.matches(seed, base_date, n_days, fares_per_day):
+                return inv
+            inv.close()
+        except (ValueError, struct.error):
+            pass
+    generate(path, seed, base_date, n_days, fares_per_day)
+    return Inventory(path)
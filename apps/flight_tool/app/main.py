@@ -1,15 +1,26 @@
 from __future__ import annotations
+import datetime as dt
+import threading
 import time
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+from fastapi import FastAPI, Request, Response, HTTPException
 from pydantic import BaseModel
-from shared.logging import configure_logging, get_logger
+from pydantic_core import to_json
+from shared.http import etag_for, etag_matches
+from shared.logging import configure_logging, get_logger, bound_contextvars
+from shared.profiling import http_sink, install_profiling
 from travel_schemas.tool_schemas import (
     ToolRegistryResponse, RegistryTool,
     ResolveLocationRequest, ResolveLocationResponse,
     SearchFlightsRequest, SearchFlightsResponse
 )
 from travel_schemas.models import FlightOffer
-from .config import LOG_LEVEL
+from travel_schemas.offer_batch import OfferBatch
+from .config import (
+    LOG_LEVEL, DB_TOOL_URL, INVENTORY_ENABLED, INVENTORY_PATH, INVENTORY_SEED,
+    INVENTORY_BASE_DATE, INVENTORY_DAYS, INVENTORY_FARES_PER_DAY,
+)
+from .inventory import Inventory, load_or_generate
 from .location_resolver import resolve
 
 configure_logging(LOG_LEVEL)
@@ -17,12 +28,43 @@ log = get_logger()
 
 app = FastAPI(title="Flight Tool Server", version="v1")
 
+# Set once the synthetic inventory is mapped; until then (or for routes/dates
+# it does not cover) searches fall back to fabricated offers.
+_inventory: Optional[Inventory] = None
+
+def _load_inventory() -> None:
+    global _inventory
+    base_date = dt.date.fromisoformat(INVENTORY_BASE_DATE) if INVENTORY_BASE_DATE else dt.date.today()
+    started = time.time()
+    try:
+        _inventory = load_or_generate(
+            INVENTORY_PATH, INVENTORY_SEED, base_date, INVENTORY_DAYS, INVENTORY_FARES_PER_DAY
+        )
+    except Exception as e:
+        log.warning("inventory_load_failed path=%s err=%r", INVENTORY_PATH, e)
+        return
+    log.info("inventory_ready fares=%s latency_ms=%s", _inventory.n_fares, int((time.time() - started) * 1000))
+
+install_profiling(app, "flight_tool", http_sink(DB_TOOL_URL))
+
+@app.middleware("http")
+async def _bind_trace_id(request: Request, call_next):
+    # every log line emitted while serving a tool call carries the caller's trace_id
+    with bound_contextvars(trace_id=request.headers.get("x-trace-id")):
+        return await call_next(request)
+
+@app.on_event("startup")
+def _startup():
+    _init_registry()
+    if INVENTORY_ENABLED:
+        # generating a fresh file takes seconds; don't hold up readiness
+        threading.Thread(target=_load_inventory, name="inventory-loader", daemon=True).start()
+
 @app.get("/health")
 def health():
     return {"ok": True, "service": "flight_tool"}
 
-@app.get("/tools/registry", response_model=ToolRegistryResponse)
-def registry():
+def _build_registry() -> ToolRegistryResponse:
     tools = [
         RegistryTool(
             name="resolve_location",
@@ -43,19 +85,42 @@ def registry():
     ]
     return ToolRegistryResponse(tools=tools)
 
+# Schemas only change with a deploy, so the registry is serialized once at startup.
+_registry_body: bytes = b""
+_registry_etag: str = ""
+
+def _init_registry() -> None:
+    global _registry_body, _registry_etag
+    _registry_body = _build_registry().model_dump_json().encode("utf-8")
+    _registry_etag = etag_for(_registry_body)
+
+@app.get("/tools/registry", response_model=ToolRegistryResponse)
+def registry(request: Request):
+    headers = {"ETag": _registry_etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), _registry_etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=_registry_body, media_type="application/json", headers=headers)
+
 @app.post("/tools/resolve_location", response_model=ResolveLocationResponse)
 def tool_resolve_location(req: ResolveLocationRequest):
     candidates = resolve(req.query)
     return ResolveLocationResponse(candidates=candidates)
 
-@app.post("/tools/search_flights", response_model=SearchFlightsResponse)
-def tool_search_flights(req: SearchFlightsRequest):
-    # MVP = mock offers (we will replace with Amadeus)
-    start = time.time()
-
-    if not req.legs:
-        raise HTTPException(status_code=400, detail="legs must not be empty")
+def _inventory_offers(inventory: Inventory, req: SearchFlightsRequest, legs) -> OfferBatch:
+    batch = OfferBatch()
+    for fares in inventory.search(legs, req.max_stops, req.max_price, req.max_results):
+        batch.append(
+            offer_id="inv_" + "_".join(str(f.index) for f in fares),
+            airline=fares[0].airline,
+            price_total=sum(f.price_cents for f in fares) / 100,
+            duration_minutes=sum(f.duration_minutes for f in fares),
+            stops=sum(f.stops for f in fares),
+            legs=req.legs,
+            currency=req.currency,
+        )
+    return batch
 
+def _fabricated_offers(req: SearchFlightsRequest) -> list[FlightOffer]:
     # produce deterministic mock offers
     flights = []
     base_price = 250.0 + 50.0 * (len(req.legs) - 1)
@@ -73,7 +138,31 @@ def tool_search_flights(req: SearchFlightsRequest):
                 source="mock",
             )
         )
+    return flights
 
-    latency_ms = int((time.time() - start) * 1000)
-    log.info("search_flights", legs=len(req.legs), returned=len(flights), latency_ms=latency_ms)
+@app.post("/tools/search_flights", response_model=SearchFlightsResponse)
+def tool_search_flights(req: SearchFlightsRequest):
+    # MVP = mock offers (we will replace with Amadeus)
+    start = time.time()
+
+    if not req.legs:
+        raise HTTPException(status_code=400, detail="legs must not be empty")
+
+    legs = [(leg.origin, leg.destination, leg.date) for leg in req.legs]
+    inventory = _inventory
+    if inventory is not None and all(inventory.covers(*leg) for leg in legs):
+        # Inventory offers are built from validated inventory columns and
+        # request legs; they go straight from the batch to JSON without a
+        # FlightOffer model per row (and without FastAPI re-validating them).
+        batch = _inventory_offers(inventory, req, legs)
+        body = {"flights": batch.to_dicts(), "count": len(batch), "cached": False}
+        _log_search(req, len(batch), start)
+        return Response(content=to_json(body), media_type="application/json")
+
+    flights = _fabricated_offers(req)
+    _log_search(req, len(flights), start)
     return SearchFlightsResponse(flights=flights, count=len(flights), cached=False)
+
+def _log_search(req: SearchFlightsRequest, returned: int, start: float) -> None:
+    latency_ms = int((time.time() - start) * 1000)
+    log.info("search_flights", legs=len(req.legs), returned=returned, latency_ms=latency_ms)
@@ -0,0 +1,81 @@
+import datetime as dt
+import itertools
+
+import pytest
+
+from app.inventory import Inventory, generate, load_or_generate
+
+BASE = dt.date(2025, 6, 1)
+DAY = "2025-06-02"
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    inv = load_or_generate(str(tmp_path / "inv.bin"), seed=7, base_date=BASE, n_days=3, fares_per_day=32)
+    yield inv
+    inv.close()
+
+
+def test_same_parameters_give_byte_identical_files(tmp_path):
+    a, b, c = tmp_path / "a.bin", tmp_path / "b.bin", tmp_path / "c.bin"
+    generate(str(a), 7, BASE, 3, 16)
+    generate(str(b), 7, BASE, 3, 16)
+    generate(str(c), 8, BASE, 3, 16)
+    assert a.read_bytes() == b.read_bytes()
+    assert a.read_bytes() != c.read_bytes()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.bin", "b.bin", "c.bin"]  # no temp files left
+
+
+def test_load_or_generate_rebuilds_when_parameters_change(tmp_path):
+    path = str(tmp_path / "inv.bin")
+    inv = load_or_generate(path, 7, BASE, 3, 16)
+    assert inv.n_fares == 9 * 8 * 3 * 16
+    inv.close()
+    inv = load_or_generate(path, 7, BASE, 2, 16)
+    assert (inv.n_days, inv.n_fares) == (2, 9 * 8 * 2 * 16)
+    inv.close()
+
+
+def test_search_is_deterministic_across_generations(tmp_path):
+    results = []
+    for name in ("a.bin", "b.bin"):
+        inv = load_or_generate(str(tmp_path / name), 7, BASE, 3, 32)
+        results.append(inv.search([("LHR", "DXB", DAY)], max_stops=2, max_price=None, limit=10))
+        inv.close()
+    assert results[0] == results[1]
+
+
+def test_covers(inventory):
+    assert inventory.covers("LHR", "DXB", DAY)
+    assert not inventory.covers("LHR", "LHR", DAY)
+    assert not inventory.covers("LHR", "XXX", DAY)
+    assert not inventory.covers("LHR", "DXB", "2025-06-04")
+    assert not inventory.covers("LHR", "DXB", "not-a-date")
+
+
+def test_search_leg_is_cheapest_first_and_filters_stops(inventory):
+    fares = inventory.search_leg("LHR", "DXB", DAY, max_stops=0, max_price=None, limit=100)
+    assert fares
+    assert all(f.stops == 0 for f in fares)
+    assert [f.price_cents for f in fares] == sorted(f.price_cents for f in fares)
+    assert len(inventory.search_leg("LHR", "DXB", DAY, 2, None, limit=5)) == 5
+
+
+def test_max_price_at_a_displayed_price_is_inclusive(inventory):
+    every = inventory.search_leg("LHR", "DXB", DAY, max_stops=2, max_price=None, limit=1000)
+    assert len(every) == 32
+    for i, fare in enumerate(every):
+        within = inventory.search_leg("LHR", "DXB", DAY, 2, max_price=fare.price, limit=1000)
+        assert len(within) == sum(1 for f in every if f.price_cents <= fare.price_cents) >= i + 1
+
+
+def test_multi_leg_search_returns_the_k_cheapest_combinations(inventory):
+    legs = [("LHR", "DXB", "2025-06-01"), ("DXB", "LHR", "2025-06-03")]
+    out = inventory.search(legs, max_stops=1, max_price=None, limit=10)
+    per_leg = [inventory.search_leg(o, d, day, 1, None, 1000) for o, d, day in legs]
+    brute = sorted(a.price_cents + b.price_cents for a, b in itertools.product(*per_leg))[:10]
+    assert [sum(f.price_cents for f in combo) for combo in out] == brute
+
+    cap = brute[4] / 100
+    capped = inventory.search(legs, max_stops=1, max_price=cap, limit=10)
+    assert [sum(f.price_cents for f in combo) for combo in capped] == [t for t in brute if t <= brute[4]]
@@ -0,0 +1,50 @@
+import datetime as dt
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+from travel_schemas.tool_schemas import SearchFlightsResponse
+
+from app import main
+from app.inventory import load_or_generate
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    inv = load_or_generate(str(tmp_path / "inv.bin"), 7, dt.date(2025, 6, 1), 3, 32)
+    monkeypatch.setattr(main, "INVENTORY_ENABLED", False)
+    monkeypatch.setattr(main, "_inventory", inv)
+    with TestClient(main.app) as c:
+        yield c
+    inv.close()
+
+
+def _search(client, destination="DXB", **kw):
+    body = {"legs": [{"origin": "LHR", "destination": destination, "date": "2025-06-02"}], **kw}
+    resp = client.post("/tools/search_flights", json=body)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_inventory_results_match_the_response_schema(client):
+    data = _search(client, max_results=5, max_stops=1)
+    parsed = SearchFlightsResponse.model_validate(data)
+    assert parsed.count == len(parsed.flights) == 5
+    prices = [f.price_total for f in parsed.flights]
+    assert prices == sorted(prices)
+    assert all(f.stops <= 1 and f.offer_id.startswith("inv_") for f in parsed.flights)
+    assert data["flights"][0]["legs"] == [{"origin": "LHR", "destination": "DXB", "date": "2025-06-02"}]
+
+
+def test_max_price_at_a_returned_price_keeps_that_offer(client):
+    cheapest = _search(client, max_results=3)["flights"]
+    again = _search(client, max_results=3, max_price=cheapest[1]["price_total"])["flights"]
+    assert [f["offer_id"] for f in again] == [f["offer_id"] for f in cheapest[:2]]
+
+
+def test_routes_outside_the_inventory_fall_back_to_fabricated_offers(client):
+    data = _search(client, destination="SYD", max_results=2)
+    assert [f["offer_id"] for f in data["flights"]] == ["mock_0", "mock_1"]
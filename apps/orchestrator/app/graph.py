@@ -1,43 +1,83 @@
 # apps/orchestrator/app/graph.py
 
-from langgraph.graph import StateGraph, END
+# LangGraph and the node module (with its LangChain integrations) are heavy to
+# import, so the graph is built on first use instead of at import time.
+# main.py calls prewarm() in the background after startup so the first request
+# does not pay for it.
+
+import threading
+from typing import Any, Optional
+
 from .state import GraphState
-from .nodes import resolve_locations, save_trip_draft, search_and_persist_flights, research_city
+
+_compiled: Optional[Any] = None
+_lock = threading.Lock()
+
 
 def should_continue(state: GraphState) -> str:
     return "end" if state.get("error") else "continue"
 
-workflow = StateGraph(GraphState)
-
-# Add Nodes
-workflow.add_node("resolve_locations", resolve_locations)
-workflow.add_node("save_trip_draft", save_trip_draft)
-workflow.add_node("search_and_persist_flights", search_and_persist_flights)
-workflow.add_node("research_city", research_city) # <--- New Node
-
-# Set Entry Point
-workflow.set_entry_point("resolve_locations")
-
-# Edges
-workflow.add_conditional_edges(
-    "resolve_locations",
-    should_continue,
-    {"continue": "save_trip_draft", "end": END}
-)
-
-# --- Parallel Execution ---
-# After saving the draft, we branch to BOTH search_flights AND research_city
-workflow.add_conditional_edges(
-    "save_trip_draft",
-    should_continue,
-    {
-        "continue": ["search_and_persist_flights", "research_city"], 
-        "end": END
-    }
-)
-
-# Both parallel nodes go to END
-workflow.add_edge("search_and_persist_flights", END)
-workflow.add_edge("research_city", END)
-
-app = workflow.compile()
+
+def build_graph():
+    from langgraph.graph import StateGraph, END
+    from .nodes import resolve_locations, save_trip_draft, search_and_persist_flights, research_city
+
+    workflow = StateGraph(GraphState)
+
+    # Add Nodes
+    workflow.add_node("resolve_locations", resolve_locations)
+    workflow.add_node("save_trip_draft", save_trip_draft)
+    workflow.add_node("search_and_persist_flights", search_and_persist_flights)
+    workflow.add_node("research_city", research_city) # <--- New Node
+
+    # Set Entry Point
+    workflow.set_entry_point("resolve_locations")
+
+    # Edges
+    workflow.add_conditional_edges(
+        "resolve_locations",
+        should_continue,
+        {"continue": "save_trip_draft", "end": END}
+    )
+
+    # --- Parallel Execution ---
+    # After saving the draft, we branch to BOTH search_flights AND research_city
+    workflow.add_conditional_edges(
+        "save_trip_draft",
+        should_continue,
+        {
+            "continue": ["search_and_persist_flights", "research_city"],
+            "end": END
+        }
+    )
+
+    # Both parallel nodes go to END
+    workflow.add_edge("search_and_persist_flights", END)
+    workflow.add_edge("research_city", END)
+
+    return workflow.compile()
+
+
+def is_ready() -> bool:
+    return _compiled is not None
+
+
+def get_graph():
+    """Compiled graph, built once per process (thread-safe)."""
+    global _compiled
+    if _compiled is None:
+        with _lock:
+            if _compiled is None:
+                _compiled = build_graph()
+    return _compiled
+
+
+def prewarm() -> None:
+    """Build the graph and load the research integrations. Blocking; run off the event loop."""
+    get_graph()
+    from .nodes import load_research_deps
+    try:
+        load_research_deps()
+    except Exception:
+        # research_city degrades on its own when the integrations are missing
+        pass
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 import time
 import uuid
@@ -12,18 +14,29 @@ from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel, Field
 
 # --- LangGraph Imports ---
-from .graph import app as graph_app
+# The graph is compiled lazily (see graph.py) to keep container start fast.
+from . import graph
 
 # Import CityResearch here
-from .state import FlightSearchIn, GraphState, CityResearch 
+from .state import FlightSearchIn, GraphState, CityResearch
 # --- End LangGraph Imports ---
 
-from shared.logging import configure_logging, get_logger
+from shared.logging import configure_logging, get_logger, bound_contextvars
 from shared.redis_client import RedisClient
 from shared.limits import RedisRateLimiter, RedisCircuitBreaker
+from shared.profiling import (
+    PROFILE_HEADER, http_sink, install_profiling, is_profiling, set_profile_trace_id,
+)
+
+from .offer_memo import OFFER_MEMO_MAX_AGE_SECONDS
+from .policy import AdmissionController, AdmissionRejected, parse_weights
+from .registry import ContractError, ToolRegistryCache
+from .tool_router import ToolRouter, hedged
+from .warmer import CacheWarmer
 
 logger = get_logger(__name__)
 
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 FLIGHT_TOOL_URL = os.getenv("FLIGHT_TOOL_URL", "http://localhost:8001")
 DB_TOOL_URL = os.getenv("DB_TOOL_URL", "http://localhost:8002")
 
@@ -32,6 +45,38 @@ CB_FAIL_THRESHOLD = int(os.getenv("CB_FAIL_THRESHOLD", "5"))
 CB_WINDOW_SECONDS = int(os.getenv("CB_WINDOW_SECONDS", "60"))
 CB_OPEN_SECONDS = int(os.getenv("CB_OPEN_SECONDS", "60"))
 
+# Admission control in front of the graph: global cap on concurrent graph runs,
+# weighted fair queueing per user key, early 503 when the wait would be too long.
+MAX_CONCURRENT_GRAPHS = int(os.getenv("MAX_CONCURRENT_GRAPHS", "32"))
+ADMISSION_MAX_QUEUE_WAIT_S = float(os.getenv("ADMISSION_MAX_QUEUE_WAIT_S", "5"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "1000"))
+ADMISSION_TENANT_WEIGHTS = os.getenv("ADMISSION_TENANT_WEIGHTS", "")  # "sess:=1,ip:=0.5"
+
+# Adaptive tool timeouts (p99 * k, capped at the registry timeout) and hedging.
+TOOL_LATENCY_WINDOW = int(os.getenv("TOOL_LATENCY_WINDOW", "200"))
+TOOL_LATENCY_MIN_SAMPLES = int(os.getenv("TOOL_LATENCY_MIN_SAMPLES", "20"))
+TOOL_TIMEOUT_P99_MULTIPLIER = float(os.getenv("TOOL_TIMEOUT_P99_MULTIPLIER", "3.0"))
+TOOL_TIMEOUT_FLOOR_MS = int(os.getenv("TOOL_TIMEOUT_FLOOR_MS", "50"))
+HEDGE_READ_ONLY_TOOLS = os.getenv("HEDGE_READ_ONLY_TOOLS", "0") == "1"
+
+# Tool registries are revalidated in the background; payloads are checked
+# against the advertised schemas on every tool call.
+REGISTRY_REFRESH_SECONDS = float(os.getenv("REGISTRY_REFRESH_SECONDS", "60"))
+CONTRACT_VALIDATION = os.getenv("CONTRACT_VALIDATION", "1") == "1"
+
+# Background refresh of persisted results for popular searches; the TTL is
+# the lookup_offers freshness window used by the search step
+# (offer_memo.OFFER_MEMO_MAX_AGE_SECONDS).
+CACHE_WARMER_ENABLED = os.getenv("CACHE_WARMER_ENABLED", "1") == "1"
+CACHE_WARMER_TOP_N = int(os.getenv("CACHE_WARMER_TOP_N", "20"))
+CACHE_WARMER_WINDOW_SECONDS = int(os.getenv("CACHE_WARMER_WINDOW_SECONDS", "3600"))
+CACHE_WARMER_LEAD_SECONDS = int(os.getenv("CACHE_WARMER_LEAD_SECONDS", "60"))
+CACHE_WARMER_INTERVAL_SECONDS = float(os.getenv("CACHE_WARMER_INTERVAL_SECONDS", "30"))
+CACHE_WARMER_CALLS_PER_MINUTE = float(os.getenv("CACHE_WARMER_CALLS_PER_MINUTE", "30"))
+
+# Build the graph and import LLM integrations in the background after startup.
+PREWARM_ON_STARTUP = os.getenv("PREWARM_ON_STARTUP", "1") == "1"
+
 
 class FlightSearchOut(BaseModel):
     trace_id: str
@@ -43,11 +88,14 @@ class FlightSearchOut(BaseModel):
 
 
 app = FastAPI(title="orchestrator", version="0.1.0")
+# PROFILE_SAMPLE_RATE (or x-profile: 1 with PROFILE_ALLOW_HEADER=1) profiles a
+# request here and, via the forwarded x-profile header, in every tool it calls
+install_profiling(app, "orchestrator", http_sink(DB_TOOL_URL))
 
 
 @app.on_event("startup")
 async def startup() -> None:
-    configure_logging()
+    configure_logging(LOG_LEVEL)
     logger.info("orchestrator starting")
 
     app.state.redis = RedisClient.from_env()
@@ -59,13 +107,70 @@ async def startup() -> None:
         window_seconds=CB_WINDOW_SECONDS,
         open_seconds=CB_OPEN_SECONDS,
     )
+    app.state.admission = AdmissionController(
+        max_concurrent=MAX_CONCURRENT_GRAPHS,
+        max_queue_wait_s=ADMISSION_MAX_QUEUE_WAIT_S,
+        max_queue=ADMISSION_MAX_QUEUE,
+        weights=parse_weights(ADMISSION_TENANT_WEIGHTS),
+    )
+    app.state.tool_router = ToolRouter(
+        window_size=TOOL_LATENCY_WINDOW,
+        min_samples=TOOL_LATENCY_MIN_SAMPLES,
+        k=TOOL_TIMEOUT_P99_MULTIPLIER,
+        floor_ms=TOOL_TIMEOUT_FLOOR_MS,
+        hedging=HEDGE_READ_ONLY_TOOLS,
+    )
+    app.state.registry = ToolRegistryCache(
+        [FLIGHT_TOOL_URL, DB_TOOL_URL], refresh_seconds=REGISTRY_REFRESH_SECONDS
+    )
+    app.state.registry.on_update = lambda c: app.state.tool_router.set_ceiling(c.name, c.timeout_ms)
+    app.state.registry_task = asyncio.create_task(app.state.registry.run())
+
+    app.state.warmer_task = None
+    if CACHE_WARMER_ENABLED:
+        warmer = CacheWarmer(
+            _tool_post,
+            r,
+            FLIGHT_TOOL_URL,
+            DB_TOOL_URL,
+            ttl_s=OFFER_MEMO_MAX_AGE_SECONDS,
+            lead_s=CACHE_WARMER_LEAD_SECONDS,
+            top_n=CACHE_WARMER_TOP_N,
+            window_s=CACHE_WARMER_WINDOW_SECONDS,
+            calls_per_minute=CACHE_WARMER_CALLS_PER_MINUTE,
+            interval_s=CACHE_WARMER_INTERVAL_SECONDS,
+        )
+        app.state.warmer_task = asyncio.create_task(warmer.run())
 
     ok = await app.state.redis.ping()
     logger.info("redis ping ok=%s", ok)
 
+    app.state.prewarm_task = None
+    if PREWARM_ON_STARTUP:
+        app.state.prewarm_task = asyncio.create_task(_prewarm())
+
+
+async def _prewarm() -> None:
+    started = time.time()
+    try:
+        await asyncio.to_thread(graph.prewarm)
+        logger.info("prewarm done latency_ms=%s", int((time.time() - started) * 1000))
+    except Exception as e:
+        logger.warning("prewarm failed err=%s", repr(e))
+
+
+async def _get_graph():
+    if graph.is_ready():
+        return graph.get_graph()
+    # First request before prewarm finished: compile off the event loop.
+    return await asyncio.to_thread(graph.get_graph)
+
 
 @app.on_event("shutdown")
 async def shutdown() -> None:
+    app.state.registry_task.cancel()
+    if app.state.warmer_task is not None:
+        app.state.warmer_task.cancel()
     await app.state.redis.close()
 
 
@@ -74,6 +179,11 @@ async def health() -> dict:
     return {"ok": True, "service": "orchestrator"}
 
 
+@app.get("/metrics/admission")
+async def admission_metrics() -> dict:
+    return app.state.admission.metrics()
+
+
 def _user_key(req: Request, payload_session_id: Optional[str]) -> str:
     if payload_session_id:
         return f"sess:{payload_session_id}"
@@ -88,8 +198,19 @@ async def _tool_post(
     trace_id: str,
     timeout_s: float,
 ) -> dict:
-    # This entire function, with its robust circuit breaker logic, remains unchanged.
-    # It is a dependency that we will inject into our graph.
+    contract = app.state.registry.get(tool_name) if CONTRACT_VALIDATION else None
+    if contract is not None:
+        try:
+            contract.check_input(payload)
+        except ContractError as e:
+            logger.error("tool_contract_violation tool=%s direction=input err=%s", tool_name, e)
+            raise HTTPException(
+                status_code=500,
+                detail={"error": "contract_violation", "tool": tool_name, "direction": "input"},
+            )
+
+    # Circuit breaker is consulted once per logical call; a hedged second
+    # request shares the same allow/on_success/on_failure.
     allowed, state = await app.state.cbreaker.allow(tool_name)
     if not allowed:
         raise HTTPException(
@@ -97,19 +218,37 @@ async def _tool_post(
             detail={"error": "tool_unavailable", "tool": tool_name, "circuit": state},
         )
 
+    router: ToolRouter = app.state.tool_router
+    timeout_s = router.timeout_s(tool_name, timeout_s)
+    hedge_after_s = router.hedge_delay_s(tool_name)
+
     headers = {"x-trace-id": trace_id}
+    if is_profiling():
+        headers[PROFILE_HEADER] = "1"
     started = time.time()
 
     try:
         async with httpx.AsyncClient(timeout=timeout_s) as client:
-            resp = await client.post(url, json=payload, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
+
+            async def _attempt() -> bytes:
+                resp = await client.post(url, json=payload, headers=headers)
+                resp.raise_for_status()
+                return resp.content
+
+            raw = await asyncio.wait_for(hedged(_attempt, hedge_after_s), timeout=timeout_s)
+        # parsed and checked in one pass; a response that breaks the contract
+        # counts as a failed call
+        data = contract.parse_output(raw) if contract is not None else json.loads(raw)
+        router.record(tool_name, (time.time() - started) * 1000)
         await app.state.cbreaker.on_success(tool_name)
         return data
     except Exception as e:
-        await app.state.cbreaker.on_failure(tool_name)
         elapsed_ms = int((time.time() - started) * 1000)
+        if isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)):
+            router.record_timeout(tool_name, timeout_s)
+        else:
+            router.record(tool_name, elapsed_ms)
+        await app.state.cbreaker.on_failure(tool_name)
         logger.warning(
             "tool_call_failed tool=%s state=%s latency_ms=%s err=%s",
             tool_name,
@@ -126,6 +265,12 @@ async def _tool_post(
 @app.post("/v1/flight_search", response_model=FlightSearchOut)
 async def flight_search(req: Request, body: FlightSearchIn) -> FlightSearchOut:
     trace_id = str(uuid.uuid4())
+    set_profile_trace_id(trace_id)
+    with bound_contextvars(trace_id=trace_id):
+        return await _flight_search(req, body, trace_id)
+
+
+async def _flight_search(req: Request, body: FlightSearchIn, trace_id: str) -> FlightSearchOut:
     user_key = _user_key(req, body.session_id)
 
     # 1. Rate limit at the boundary (unchanged)
@@ -156,8 +301,24 @@ async def flight_search(req: Request, body: FlightSearchIn) -> FlightSearchOut:
     # This is how our nodes get access to the robust `_tool_post` function.
     config = {"configurable": {"tool_post": _tool_post}}
 
-    # 4. Invoke the graph and let it orchestrate the tool calls
-    final_state = await graph_app.ainvoke(initial_state, config)
+    # 4. Invoke the graph and let it orchestrate the tool calls,
+    #    once the admission controller grants a slot
+    admission: AdmissionController = app.state.admission
+    try:
+        await admission.acquire(user_key)
+    except AdmissionRejected as e:
+        logger.warning("admission_rejected user=%s reason=%s", user_key, e.reason)
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "overloaded", "reason": e.reason, "retry_after_seconds": e.retry_after_s},
+            headers={"Retry-After": str(e.retry_after_s)},
+        )
+    admitted_at = time.monotonic()
+    try:
+        graph_app = await _get_graph()
+        final_state = await graph_app.ainvoke(initial_state, config)
+    finally:
+        admission.release(time.monotonic() - admitted_at)
 
     # 5. Handle the result from the graph
     if final_state.get("error"):
@@ -176,5 +337,8 @@ async def flight_search(req: Request, body: FlightSearchIn) -> FlightSearchOut:
         destination=final_state["destination_code"],
         results=final_state["flight_results"],
         # Populate the new field from the final state
-        research=final_state.get("city_research")
+        research=(
+            CityResearch(city=body.destination, guide=final_state["city_guide"])
+            if final_state.get("city_guide") else None
+        ),
     )
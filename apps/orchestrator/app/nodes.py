@@ -1,25 +1,95 @@
 # apps/orchestrator/app/nodes.py
 
-import os
+import asyncio
+import functools
 from typing import Any, Dict
 from langchain_core.runnables import RunnableConfig
-from langchain_openai import ChatOpenAI
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.prompts import ChatPromptTemplate
+from shared.logging import get_logger
 from .state import GraphState
+from .config import DB_TOOL_URL, FLIGHT_TOOL_URL
+from .offer_memo import search_persisted
 
-# ... (Keep existing URL constants) ...
-FLIGHT_TOOL_URL = os.getenv("FLIGHT_TOOL_URL", "http://localhost:8001")
-DB_TOOL_URL = os.getenv("DB_TOOL_URL", "http://localhost:8002")
+logger = get_logger(__name__)
+
+
+def _tool_post(config: RunnableConfig):
+    # main.py passes its contract-checked, circuit-broken _tool_post here
+    return config["configurable"]["tool_post"]
+
+
+async def resolve_locations(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    """Resolve the free-text origin and destination to airport codes."""
+    logger.info("node_start node=resolve_locations")
+    tool_post = _tool_post(config)
+    body = state["request_body"]
+
+    async def resolve(query: str):
+        data = await tool_post(
+            "resolve_location",
+            f"{FLIGHT_TOOL_URL}/tools/resolve_location",
+            {"query": query},
+            state["trace_id"],
+            2.0,
+        )
+        candidates = data.get("candidates", [])
+        return candidates[0]["code"] if candidates else None
+
+    try:
+        origin, destination = await asyncio.gather(resolve(body.origin), resolve(body.destination))
+    except Exception as e:
+        return {"error": f"resolve_location failed: {e!r}"}
+    if origin is None:
+        return {"error": f"could not resolve origin {body.origin!r}"}
+    if destination is None:
+        return {"error": f"could not resolve destination {body.destination!r}"}
+    return {"origin_code": origin, "destination_code": destination}
+
+
+async def save_trip_draft(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    """Create the trip every search of this request is stored under."""
+    logger.info("node_start node=save_trip_draft")
+    body = state["request_body"]
+    try:
+        data = await _tool_post(config)(
+            "save_trip",
+            f"{DB_TOOL_URL}/tools/save_trip",
+            {"session_id": body.session_id or state["trace_id"], "trip_type": "flight"},
+            state["trace_id"],
+            2.0,
+        )
+    except Exception as e:
+        return {"error": f"save_trip failed: {e!r}"}
+    return {"trip_id": data["trip_id"]}
+
+
+async def search_and_persist_flights(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
+    """Search flights (answered from stored offers when an identical search is fresh) and persist them."""
+    logger.info("node_start node=search_and_persist_flights")
+    try:
+        return await search_persisted(_tool_post(config), state)
+    except Exception as e:
+        return {"error": f"flight search failed: {e!r}"}
+
+
+@functools.lru_cache(maxsize=1)
+def load_research_deps():
+    """
+    Import the LLM / web-search integrations on first use.
+    These pull in large dependency trees, so they are kept off the import path
+    of the service; graph.prewarm() calls this in the background after startup.
+    """
+    from langchain_openai import ChatOpenAI
+    from langchain_community.tools.tavily_search import TavilySearchResults
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatOpenAI, TavilySearchResults, ChatPromptTemplate
 
-# ... (Keep resolve_locations, save_trip_draft, search_and_persist_flights) ...
 
 # --- New Node for Phase 1.6 ---
 async def research_city(state: GraphState, config: RunnableConfig) -> Dict[str, Any]:
     """
     Uses an LLM and Web Search to generate a short city guide.
     """
-    print("---NODE: RESEARCHING CITY---")
+    logger.info("node_start node=research_city")
     
     # 1. Check if we have the destination name (not just code)
     # In a real app, we might want the full city name, but let's use the user's input 'destination'
@@ -29,6 +99,7 @@ async def research_city(state: GraphState, config: RunnableConfig) -> Dict[str,
     # 2. Initialize Tool and LLM
     # Note: In production, you might initialize these once globally or pass via config to save overhead
     try:
+        ChatOpenAI, TavilySearchResults, ChatPromptTemplate = load_research_deps()
         search_tool = TavilySearchResults(max_results=3)
         llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.5)
         
@@ -64,5 +135,5 @@ async def research_city(state: GraphState, config: RunnableConfig) -> Dict[str,
     except Exception as e:
         # If research fails (e.g., API key missing), we don't want to fail the whole trip plan.
         # We just return a fallback message.
-        print(f"Research failed: {e}")
+        logger.warning("research_city_failed err=%s", repr(e))
         return {"city_guide": "Could not generate city guide at this time."}
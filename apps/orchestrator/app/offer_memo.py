@@ -0,0 +1,121 @@
+"""
+Query-hash memoization of flight searches.
+
+A search is identified by the sha256 of its canonical search_flights payload.
+db_tool stores that hash with every search (save_search) and serves the
+newest stored offers for it through lookup_offers, so a repeated query within
+OFFER_MEMO_MAX_AGE_SECONDS is answered without calling flight_tool.
+
+search_persisted is the graph's search step. The module is kept free of
+LangGraph/LangChain imports: main.py (the cache warmer) and the graph nodes
+both use it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import DB_TOOL_URL, FLIGHT_TOOL_URL
+from .state import GraphState
+
+# save_search provider of a search answered from a stored one
+MEMO_PROVIDER = "offer_memo"
+FLIGHT_PROVIDER = "flight_tool"
+
+# How old a persisted search may be and still answer a repeated query.
+OFFER_MEMO_MAX_AGE_SECONDS = int(os.getenv("OFFER_MEMO_MAX_AGE_SECONDS", "900"))
+
+
+def build_search_params(state: GraphState) -> Dict[str, Any]:
+    """
+    The search_flights payload for the current state. This is also what gets
+    stored as params_json, so a stored search can be replayed verbatim.
+    """
+    body = state["request_body"]
+    return {
+        "legs": [{
+            "origin": state["origin_code"],
+            "destination": state["destination_code"],
+            "date": body.date,
+        }],
+        "max_results": body.max_results,
+        "max_stops": body.max_stops,
+        "max_price": body.max_price,
+        "currency": body.currency.upper(),
+    }
+
+
+def query_hash(params: Dict[str, Any]) -> str:
+    """Stable hash of a search payload (key order and whitespace do not matter)."""
+    canonical = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+async def lookup_persisted_offers(
+    tool_post: Callable[..., Any],
+    params: Dict[str, Any],
+    trace_id: str,
+    max_age_seconds: int = OFFER_MEMO_MAX_AGE_SECONDS,
+) -> Optional[List[dict]]:
+    """
+    Ask db_tool for the newest stored offers of an identical search.
+    Returns None on a miss; a failing lookup is treated as a miss so the
+    search still reaches flight_tool.
+    """
+    try:
+        data = await tool_post(
+            "lookup_offers",
+            f"{DB_TOOL_URL}/tools/lookup_offers",
+            {"query_hash": query_hash(params), "max_age_seconds": max_age_seconds},
+            trace_id,
+            1.0,
+        )
+    except Exception:
+        return None
+    if not data.get("hit"):
+        return None
+    return data.get("offers", [])
+
+
+async def search_persisted(tool_post: Callable[..., Any], state: GraphState) -> Dict[str, Any]:
+    """
+    Flight results for the state, recorded as a search of its trip.
+
+    A fresh identical search is answered by lookup_offers; otherwise
+    flight_tool is called and its offers are stored under the new search.
+    A memo hit stores the search (it is demand the cache warmer should see)
+    but not the offers again, so serving a memo never extends its freshness.
+    """
+    params = build_search_params(state)
+    trace_id = state["trace_id"]
+    offers = await lookup_persisted_offers(tool_post, params, trace_id)
+    hit = offers is not None
+    if not hit:
+        result = await tool_post(
+            "search_flights", f"{FLIGHT_TOOL_URL}/tools/search_flights", params, trace_id, 5.0
+        )
+        offers = result.get("flights", [])
+
+    saved = await tool_post(
+        "save_search",
+        f"{DB_TOOL_URL}/tools/save_search",
+        {
+            "trip_id": state["trip_id"],
+            "provider": MEMO_PROVIDER if hit else FLIGHT_PROVIDER,
+            "params_json": params,
+            "query_hash": query_hash(params),
+        },
+        trace_id,
+        2.0,
+    )
+    if not hit:
+        await tool_post(
+            "save_offers",
+            f"{DB_TOOL_URL}/tools/save_offers",
+            {"search_id": saved["search_id"], "offers": offers},
+            trace_id,
+            2.0,
+        )
+    return {"search_id": saved["search_id"], "flight_results": offers}
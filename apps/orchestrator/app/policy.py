@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after_s: int):
+        super().__init__(reason)
+        self.reason = reason  # "queue_full" | "predicted_wait" | "queue_timeout"
+        self.retry_after_s = retry_after_s
+
+
+class AdmissionController:
+    """
+    Global concurrency cap with a per-tenant weighted fair queue.
+
+    Requests beyond `max_concurrent` wait in a queue ordered by virtual finish
+    time (start-time fair queueing), so a tenant with weight w gets ~w slots
+    for every slot of a weight-1 tenant, however many requests each has
+    queued. Requests are shed up front when the predicted wait exceeds
+    `max_queue_wait_s`, and dropped if they do wait that long.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue_wait_s: float,
+        max_queue: int = 1000,
+        weights: Optional[Dict[str, float]] = None,
+        ewma_alpha: float = 0.2,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue_wait_s = max_queue_wait_s
+        self.max_queue = max_queue
+        # longest matching key prefix wins, e.g. {"sess:": 1.0, "ip:": 0.5}
+        self.weights = sorted((weights or {}).items(), key=lambda kv: -len(kv[0]))
+        self.ewma_alpha = ewma_alpha
+
+        self.in_flight = 0
+        self._vtime = 0.0
+        self._last_finish: Dict[str, float] = {}
+        self._heap: List[Tuple[float, int, str, asyncio.Future]] = []
+        self._seq = 0
+        self._queued: Dict[str, int] = {}
+        self._queued_total = 0
+        self._service_s: Optional[float] = None
+
+        self.admitted = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "predicted_wait": 0, "queue_timeout": 0}
+
+    def weight(self, tenant: str) -> float:
+        for prefix, w in self.weights:
+            if tenant.startswith(prefix):
+                return w
+        return 1.0
+
+    def predicted_wait_s(self) -> float:
+        if self._service_s is None or self.in_flight < self.max_concurrent:
+            return 0.0
+        return (self._queued_total + 1) * self._service_s / self.max_concurrent
+
+    def _reject(self, reason: str, wait_s: float) -> AdmissionRejected:
+        self.shed[reason] += 1
+        return AdmissionRejected(reason, max(1, math.ceil(wait_s)))
+
+    async def acquire(self, tenant: str) -> None:
+        if self.in_flight < self.max_concurrent and not self._queued_total:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self._queued_total >= self.max_queue:
+            raise self._reject("queue_full", self.predicted_wait_s())
+        predicted = self.predicted_wait_s()
+        if predicted > self.max_queue_wait_s:
+            raise self._reject("predicted_wait", predicted)
+
+        start = max(self._vtime, self._last_finish.get(tenant, 0.0))
+        finish = start + 1.0 / self.weight(tenant)
+        self._last_finish[tenant] = finish
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(self._heap, (finish, self._seq, tenant, fut))
+        self._queued[tenant] = self._queued.get(tenant, 0) + 1
+        self._queued_total += 1
+
+        try:
+            await asyncio.wait({fut}, timeout=self.max_queue_wait_s)
+        except asyncio.CancelledError:
+            self._abandon(tenant, fut)
+            raise
+        if not fut.done():
+            self._abandon(tenant, fut)
+            raise self._reject("queue_timeout", self.predicted_wait_s() or self.max_queue_wait_s)
+        self.admitted += 1
+
+    def _abandon(self, tenant: str, fut: asyncio.Future) -> None:
+        if fut.done() and not fut.cancelled():
+            # slot was granted just before the waiter gave up: hand it on
+            self.release()
+            return
+        fut.cancel()  # left in the heap; skipped on dispatch
+        self._dequeued(tenant)
+
+    def _dequeued(self, tenant: str) -> None:
+        self._queued_total -= 1
+        left = self._queued[tenant] - 1
+        if left:
+            self._queued[tenant] = left
+        else:
+            del self._queued[tenant]
+
+    def release(self, service_s: Optional[float] = None) -> None:
+        if service_s is not None:
+            prev = self._service_s
+            self._service_s = service_s if prev is None else prev + self.ewma_alpha * (service_s - prev)
+        self.in_flight -= 1
+
+        while self._heap and self.in_flight < self.max_concurrent:
+            finish, _, tenant, fut = heapq.heappop(self._heap)
+            if fut.done():
+                continue
+            self._vtime = finish
+            self._dequeued(tenant)
+            self.in_flight += 1
+            fut.set_result(None)
+
+        if len(self._last_finish) > 4 * self.max_queue:
+            # tenants whose tag is behind virtual time are idle; forgetting them is exact
+            self._last_finish = {t: f for t, f in self._last_finish.items() if f > self._vtime}
+
+    def metrics(self) -> dict:
+        top = sorted(self._queued.items(), key=lambda kv: -kv[1])[:20]
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": self._queued_total,
+            "queue_depth_by_tenant": dict(top),
+            "tenants_queued": len(self._queued),
+            "predicted_wait_ms": int(self.predicted_wait_s() * 1000),
+            "service_time_ewma_ms": int((self._service_s or 0.0) * 1000),
+            "admitted_total": self.admitted,
+            "shed_total": dict(self.shed),
+        }
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """`"sess:=1,ip:=0.5"` -> {"sess:": 1.0, "ip:": 0.5}"""
+    out: Dict[str, float] = {}
+    for part in spec.split(","):
+        if "=" in part:
+            prefix, value = part.rsplit("=", 1)
+            out[prefix.strip()] = float(value)
+    return out
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from pydantic_core import SchemaValidator, ValidationError, core_schema
+
+from shared.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ContractError(ValueError):
+    """A tool payload does not match the schema advertised in the registry."""
+
+
+# --- JSON schema -> pydantic-core validator ---
+# The registry schemas are translated once into a pydantic-core schema and
+# compiled into a SchemaValidator, so every check runs in pydantic-core's
+# compiled code instead of walking the schema in Python. Every node is strict
+# (no coercion), matching JSON Schema semantics. Supports the subset pydantic
+# emits for our tool schemas: $ref/$defs, type (incl. lists of types),
+# properties/required/additionalProperties, items, anyOf/allOf, enum/const and
+# the string/number/array bounds. Unknown keywords are ignored.
+
+_SCALARS: Dict[str, Callable[[dict], core_schema.CoreSchema]] = {
+    "string": lambda n: core_schema.str_schema(
+        min_length=n.get("minLength"),
+        max_length=n.get("maxLength"),
+        pattern=n.get("pattern"),
+        regex_engine="python-re",
+        strict=True,
+    ),
+    "integer": lambda n: core_schema.int_schema(
+        ge=n.get("minimum"), le=n.get("maximum"),
+        gt=n.get("exclusiveMinimum"), lt=n.get("exclusiveMaximum"),
+        strict=True,
+    ),
+    "number": lambda n: core_schema.float_schema(
+        ge=n.get("minimum"), le=n.get("maximum"),
+        gt=n.get("exclusiveMinimum"), lt=n.get("exclusiveMaximum"),
+        allow_inf_nan=False,
+        strict=True,
+    ),
+    "boolean": lambda n: core_schema.bool_schema(strict=True),
+    "null": lambda n: core_schema.none_schema(),
+}
+
+
+def _def_ref(ref: str) -> str:
+    return ref.rsplit("/", 1)[-1]
+
+
+def _to_core(node: Any) -> core_schema.CoreSchema:
+    if not isinstance(node, dict) or not node:
+        return core_schema.any_schema()
+    if "$ref" in node:
+        return core_schema.definition_reference_schema(_def_ref(node["$ref"]))
+    if "const" in node:
+        return core_schema.literal_schema([node["const"]])
+    if "enum" in node:
+        return core_schema.literal_schema(list(node["enum"]))
+    if "anyOf" in node:
+        options = [_to_core(o) for o in node["anyOf"]]
+        nulls = [o for o in options if o["type"] == "none"]
+        others = [o for o in options if o["type"] != "none"]
+        if nulls and len(others) == 1:
+            return core_schema.nullable_schema(others[0])
+        return core_schema.union_schema(options)
+    if "allOf" in node:
+        parts = [_to_core(o) for o in node["allOf"]]
+        return parts[0] if len(parts) == 1 else core_schema.chain_schema(parts)
+
+    types = node.get("type")
+    if types is None and ("properties" in node or "required" in node):
+        types = "object"
+    if isinstance(types, list):
+        return core_schema.union_schema([_to_core({**node, "type": t}) for t in types])
+    if types in _SCALARS:
+        return _SCALARS[types](node)
+    if types == "array":
+        return core_schema.list_schema(
+            _to_core(node.get("items")),
+            min_length=node.get("minItems"),
+            max_length=node.get("maxItems"),
+            strict=True,
+        )
+    if types == "object":
+        extra = node.get("additionalProperties", True)
+        if "properties" not in node and "required" not in node:
+            if extra is False:
+                return core_schema.typed_dict_schema({}, extra_behavior="forbid", strict=True)
+            return core_schema.dict_schema(core_schema.str_schema(), _to_core(extra), strict=True)
+        required = set(node.get("required", ()))
+        properties = node.get("properties", {})
+        fields = {
+            name: core_schema.typed_dict_field(_to_core(sub), required=name in required)
+            for name, sub in properties.items()
+        }
+        for name in required - properties.keys():
+            fields[name] = core_schema.typed_dict_field(core_schema.any_schema(), required=True)
+        return core_schema.typed_dict_schema(
+            fields, extra_behavior="forbid" if extra is False else "allow", strict=True
+        )
+    return core_schema.any_schema()
+
+
+def _format_loc(loc: tuple) -> str:
+    path = "$"
+    for part in loc:
+        path += f"[{part}]" if isinstance(part, int) else f".{part}"
+    return path
+
+
+class CompiledSchema:
+    """A JSON schema compiled into a pydantic-core validator."""
+
+    __slots__ = ("_validator",)
+
+    def __init__(self, schema: dict):
+        definitions = [
+            {**_to_core(sub), "ref": name} for name, sub in schema.get("$defs", {}).items()
+        ]
+        root = _to_core(schema)
+        if definitions:
+            root = core_schema.definitions_schema(root, definitions)
+        self._validator = SchemaValidator(root)
+
+    def check(self, value: Any) -> None:
+        """Raise ContractError unless `value` matches."""
+        try:
+            self._validator.validate_python(value)
+        except ValidationError as e:
+            raise _contract_error(e) from None
+
+    def parse_json(self, raw: bytes) -> Any:
+        """
+        Parse and validate a JSON document in one pass (no json.loads first).
+        Returns the same plain dicts/lists json.loads would.
+        """
+        try:
+            return self._validator.validate_json(raw)
+        except ValidationError as e:
+            raise _contract_error(e) from None
+
+
+def _contract_error(e: ValidationError) -> ContractError:
+    err = e.errors(include_url=False)[0]
+    return ContractError(f"{_format_loc(err['loc'])}: {err['msg']}")
+
+
+@dataclass(frozen=True)
+class ToolContract:
+    name: str
+    timeout_ms: int
+    input: CompiledSchema
+    output: CompiledSchema
+
+    def check_input(self, payload: Any) -> None:
+        self.input.check(payload)
+
+    def parse_output(self, raw: bytes) -> Any:
+        return self.output.parse_json(raw)
+
+
+class ToolRegistryCache:
+    """
+    Fetches /tools/registry from each tool server, revalidating with
+    If-None-Match, and keeps compiled input/output validators per tool.
+    Tools not (yet) in the registry are simply not validated.
+    """
+
+    def __init__(self, base_urls: List[str], refresh_seconds: float = 60.0):
+        self.base_urls = base_urls
+        self.refresh_seconds = refresh_seconds
+        self._etags: Dict[str, str] = {}
+        self._contracts_by_url: Dict[str, Dict[str, ToolContract]] = {}
+        self._contracts: Dict[str, ToolContract] = {}
+        self.on_update: Optional[Callable[[ToolContract], None]] = None
+
+    def get(self, tool_name: str) -> Optional[ToolContract]:
+        return self._contracts.get(tool_name)
+
+    async def refresh(self, client: httpx.AsyncClient) -> None:
+        for base_url in self.base_urls:
+            try:
+                await self._refresh_one(client, base_url)
+            except Exception as e:
+                logger.warning("registry_refresh_failed url=%s err=%s", base_url, repr(e))
+
+    async def _refresh_one(self, client: httpx.AsyncClient, base_url: str) -> None:
+        headers = {}
+        if base_url in self._etags:
+            headers["If-None-Match"] = self._etags[base_url]
+        resp = await client.get(f"{base_url}/tools/registry", headers=headers)
+        if resp.status_code == 304:
+            return
+        resp.raise_for_status()
+
+        contracts = {}
+        for tool in resp.json().get("tools", []):
+            contracts[tool["name"]] = ToolContract(
+                name=tool["name"],
+                timeout_ms=int(tool.get("timeout_ms", 5000)),
+                input=CompiledSchema(tool.get("input_schema") or {}),
+                output=CompiledSchema(tool.get("output_schema") or {}),
+            )
+        self._contracts_by_url[base_url] = contracts
+        merged: Dict[str, ToolContract] = {}
+        for by_url in self._contracts_by_url.values():
+            merged.update(by_url)
+        self._contracts = merged
+        if resp.headers.get("etag"):
+            self._etags[base_url] = resp.headers["etag"]
+        if self.on_update is not None:
+            for contract in contracts.values():
+                self.on_update(contract)
+        logger.info("registry_loaded url=%s tools=%s", base_url, len(contracts))
+
+    async def run(self) -> None:
+        """Background loop: fetch now, then revalidate every refresh_seconds."""
+        async with httpx.AsyncClient(timeout=2.0) as client:
+            while True:
+                await self.refresh(client)
+                await asyncio.sleep(self.refresh_seconds)
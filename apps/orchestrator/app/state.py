@@ -13,6 +13,11 @@ class FlightSearchIn(BaseModel):
     max_price: Optional[float] = None
     currency: str = Field(default="USD", min_length=3, max_length=3)
 
+class CityResearch(BaseModel):
+    """research_city's guide for the destination, as returned to the client."""
+    city: str
+    guide: str
+
 class GraphState(TypedDict):
     # Input
     request_body: FlightSearchIn
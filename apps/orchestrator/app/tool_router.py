@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+import math
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Timeouts advertised by the tool servers' /tools/registry.
+REGISTRY_TIMEOUT_MS: Dict[str, int] = {
+    "resolve_location": 2000,
+    "search_flights": 5000,
+    "save_trip": 5000,
+    "save_search": 5000,
+    "save_offers": 5000,
+    "log_tool_call": 5000,
+    "get_trip": 5000,
+    "lookup_offers": 1000,
+    "get_fare_calendar": 1000,
+}
+
+# Safe to send twice: no side effects on the tool server.
+READ_ONLY_TOOLS = frozenset({"resolve_location", "search_flights", "get_trip"})
+
+
+class LatencyWindow:
+    """
+    Rolling window of the last `size` call latencies (ms).
+    """
+
+    def __init__(self, size: int):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, latency_ms: float) -> None:
+        self._samples.append(latency_ms)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self._samples)
+        idx = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[idx]
+
+
+class ToolRouter:
+    """
+    Per-tool latency tracking for the orchestrator's tool calls.
+
+    - timeout: p99 * k, clamped to [floor_ms, registry timeout_ms]; calls
+      that time out are recorded at the timeout, so it follows a slowdown
+    - hedge delay: p95, for read-only tools when hedging is enabled
+    Until a tool has `min_samples` observations the caller's timeout
+    (capped at the registry value) is used and no hedge is sent.
+    """
+
+    def __init__(
+        self,
+        window_size: int = 200,
+        min_samples: int = 20,
+        k: float = 3.0,
+        floor_ms: int = 50,
+        hedging: bool = False,
+        ceilings_ms: Optional[Dict[str, int]] = None,
+    ):
+        self.window_size = window_size
+        self.min_samples = min_samples
+        self.k = k
+        self.floor_ms = floor_ms
+        self.hedging = hedging
+        self.ceilings_ms = dict(REGISTRY_TIMEOUT_MS if ceilings_ms is None else ceilings_ms)
+        self._windows: Dict[str, LatencyWindow] = {}
+
+    def _window(self, tool: str) -> LatencyWindow:
+        w = self._windows.get(tool)
+        if w is None:
+            w = self._windows[tool] = LatencyWindow(self.window_size)
+        return w
+
+    def set_ceiling(self, tool: str, timeout_ms: int) -> None:
+        self.ceilings_ms[tool] = timeout_ms
+
+    def record(self, tool: str, latency_ms: float) -> None:
+        self._window(tool).add(latency_ms)
+
+    def record_timeout(self, tool: str, timeout_s: float) -> None:
+        """
+        A call cut off at `timeout_s` took at least that long. Counting it at
+        the timeout lets p99 * k grow past the current timeout when a tool
+        slows down, instead of every call timing out at a value learned from
+        faster days.
+        """
+        self._window(tool).add(timeout_s * 1000)
+
+    def timeout_s(self, tool: str, default_s: float) -> float:
+        ceiling_ms = self.ceilings_ms.get(tool)
+        w = self._window(tool)
+        if len(w) < self.min_samples:
+            timeout_ms = default_s * 1000
+        else:
+            timeout_ms = max(self.floor_ms, w.quantile(0.99) * self.k)
+        if ceiling_ms is not None:
+            timeout_ms = min(timeout_ms, ceiling_ms)
+        return timeout_ms / 1000
+
+    def hedge_delay_s(self, tool: str) -> Optional[float]:
+        if not self.hedging or tool not in READ_ONLY_TOOLS:
+            return None
+        w = self._window(tool)
+        if len(w) < self.min_samples:
+            return None
+        return w.quantile(0.95) / 1000
+
+
+async def hedged(call: Callable[[], Awaitable[T]], hedge_after_s: Optional[float]) -> T:
+    """
+    Run `call`; if it has not finished after `hedge_after_s`, start a second
+    identical call and return whichever succeeds first. The other one is
+    cancelled. Raises the last error if every attempt fails.
+    """
+    first = asyncio.ensure_future(call())
+    if hedge_after_s is None:
+        return await first
+
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after_s)
+        if done:
+            return first.result()
+
+        tasks.append(asyncio.ensure_future(call()))
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for t in done:
+                if t.exception() is None:
+                    return t.result()
+                error = t.exception()
+        raise error
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
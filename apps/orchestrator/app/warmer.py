@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Optional
+
+import redis.asyncio as redis
+
+from shared.logging import get_logger
+from travel_schemas.tool_schemas import CACHE_WARMER_TRIP_ID
+
+logger = get_logger(__name__)
+
+# Provider name the warmer stores its searches under (in CACHE_WARMER_TRIP_ID,
+# never in a user's trip), so they are served by lookup_offers like any other
+# search but do not count as user demand.
+WARMER_PROVIDER = "cache_warmer"
+
+
+class TokenBucket:
+    """Continuous-refill token bucket; `rate_per_minute` tokens, burst of the same size."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = max(1.0, rate_per_minute)
+        self.rate_per_s = rate_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def try_take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_s)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class CacheWarmer:
+    """
+    Keeps persisted results for the most popular recent searches fresh.
+
+    Every `interval_s` it asks db_tool for the top-N query hashes of the last
+    `window_s`, and re-runs (search_flights -> save_search -> save_offers) each
+    one whose newest stored result is within `lead_s` of the `ttl_s`
+    freshness window used by lookup_offers. Provider calls are limited to
+    `calls_per_minute` across the deployment: only the replica holding the
+    Redis leader lease warms.
+    """
+
+    def __init__(
+        self,
+        tool_post: Callable[..., Awaitable[Any]],
+        r: redis.Redis,
+        flight_tool_url: str,
+        db_tool_url: str,
+        ttl_s: int,
+        lead_s: int = 60,
+        top_n: int = 20,
+        window_s: int = 3600,
+        calls_per_minute: float = 30,
+        interval_s: float = 30,
+    ):
+        self.tool_post = tool_post
+        self.r = r
+        self.flight_tool_url = flight_tool_url
+        self.db_tool_url = db_tool_url
+        self.ttl_s = ttl_s
+        self.lead_s = lead_s
+        self.top_n = top_n
+        self.window_s = window_s
+        self.interval_s = interval_s
+        self.budget = TokenBucket(calls_per_minute)
+        self.instance_id = str(uuid.uuid4())
+
+    async def _is_leader(self) -> bool:
+        key = "warmer:leader"
+        lease = int(self.interval_s * 3)
+        if await self.r.set(key, self.instance_id, nx=True, ex=lease):
+            return True
+        if await self.r.get(key) == self.instance_id:
+            await self.r.expire(key, lease)
+            return True
+        return False
+
+    async def run(self) -> None:
+        while True:
+            try:
+                if await self._is_leader():
+                    await self.warm_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("cache_warmer_cycle_failed err=%s", repr(e))
+            await asyncio.sleep(self.interval_s)
+
+    async def warm_once(self) -> int:
+        """One pass over the popular searches; returns how many were refreshed."""
+        trace_id = f"warm-{uuid.uuid4()}"
+        popular = await self.tool_post(
+            "popular_searches",
+            f"{self.db_tool_url}/tools/popular_searches",
+            {"window_seconds": self.window_s, "limit": self.top_n, "exclude_provider": WARMER_PROVIDER},
+            trace_id,
+            2.0,
+        )
+        refreshed = 0
+        for entry in popular.get("searches", []):
+            age = entry["age_seconds"]
+            if age is not None and age < self.ttl_s - self.lead_s:
+                continue
+            if not self.budget.try_take():
+                logger.info("cache_warmer_budget_exhausted refreshed=%s", refreshed)
+                break
+            await self._refresh(entry, trace_id)
+            refreshed += 1
+        return refreshed
+
+    async def _refresh(self, entry: dict, trace_id: str) -> Optional[str]:
+        params = entry["params_json"]
+        try:
+            result = await self.tool_post(
+                "search_flights", f"{self.flight_tool_url}/tools/search_flights", params, trace_id, 5.0
+            )
+            saved = await self.tool_post(
+                "save_search",
+                f"{self.db_tool_url}/tools/save_search",
+                {
+                    "trip_id": CACHE_WARMER_TRIP_ID,
+                    "provider": WARMER_PROVIDER,
+                    "params_json": params,
+                    "query_hash": entry["query_hash"],
+                },
+                trace_id,
+                2.0,
+            )
+            await self.tool_post(
+                "save_offers",
+                f"{self.db_tool_url}/tools/save_offers",
+                {"search_id": saved["search_id"], "offers": result.get("flights", [])},
+                trace_id,
+                2.0,
+            )
+        except Exception as e:
+            logger.warning("cache_warmer_refresh_failed query_hash=%s err=%s", entry["query_hash"], repr(e))
+            return None
+        logger.info(
+            "cache_warmer_refreshed query_hash=%s hits=%s age_s=%s",
+            entry["query_hash"], entry["hits"], entry["age_seconds"],
+        )
+        return saved["search_id"]
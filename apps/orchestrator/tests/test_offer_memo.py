@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from app.offer_memo import build_search_params, lookup_persisted_offers, query_hash, search_persisted
+from app.state import FlightSearchIn
+
+
+def _state(**body):
+    req = FlightSearchIn(origin="London", destination="Dubai", date="2025-06-15", **body)
+    return {"request_body": req, "origin_code": "LHR", "destination_code": "DXB"}
+
+
+def test_search_params_match_search_flights_payload():
+    params = build_search_params(_state(currency="usd", max_price=900))
+    assert params == {
+        "legs": [{"origin": "LHR", "destination": "DXB", "date": "2025-06-15"}],
+        "max_results": 10,
+        "max_stops": 2,
+        "max_price": 900,
+        "currency": "USD",
+    }
+
+
+def test_query_hash_is_canonical():
+    a = build_search_params(_state(currency="usd"))
+    b = dict(reversed(list(build_search_params(_state(currency="USD")).items())))
+    assert query_hash(a) == query_hash(b)
+    assert len(query_hash(a)) == 64
+
+
+def test_query_hash_changes_with_any_search_parameter():
+    base = query_hash(build_search_params(_state()))
+    assert query_hash(build_search_params(_state(max_stops=0))) != base
+    assert query_hash(build_search_params(_state(max_price=100))) != base
+
+
+class _FakeTool:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.calls = []
+
+    async def __call__(self, tool_name, url, payload, trace_id, timeout_s):
+        self.calls.append((tool_name, url, payload))
+        if self.error:
+            raise self.error
+        return self.response
+
+
+def test_lookup_hit_returns_stored_offers():
+    params = build_search_params(_state())
+    tool = _FakeTool({"hit": True, "search_id": "s1", "offers": [{"offer_id": "o1"}]})
+    offers = asyncio.run(lookup_persisted_offers(tool, params, "t1", max_age_seconds=60))
+    assert offers == [{"offer_id": "o1"}]
+    name, url, payload = tool.calls[0]
+    assert name == "lookup_offers" and url.endswith("/tools/lookup_offers")
+    assert payload == {"query_hash": query_hash(params), "max_age_seconds": 60}
+
+
+def test_lookup_miss_and_failure_return_none():
+    params = build_search_params(_state())
+    assert asyncio.run(lookup_persisted_offers(_FakeTool({"hit": False}), params, "t1")) is None
+    failing = _FakeTool(error=TimeoutError())
+    assert asyncio.run(lookup_persisted_offers(failing, params, "t1")) is None
+
+
+class _Tools:
+    """Fake tool_post answering by tool name."""
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+        self.calls = []
+
+    async def __call__(self, tool_name, url, payload, trace_id, timeout_s):
+        self.calls.append((tool_name, payload))
+        return {
+            "lookup_offers": self.lookup,
+            "search_flights": {"flights": [{"offer_id": "live"}], "count": 1},
+            "save_search": {"search_id": "s-new"},
+            "save_offers": {"ok": True},
+        }[tool_name]
+
+
+def _search_state():
+    return {**_state(), "trace_id": "t1", "trip_id": "trip-1"}
+
+
+def test_search_miss_calls_flight_tool_and_stores_offers():
+    tools = _Tools({"hit": False})
+    out = asyncio.run(search_persisted(tools, _search_state()))
+    assert out == {"search_id": "s-new", "flight_results": [{"offer_id": "live"}]}
+    assert [name for name, _ in tools.calls] == ["lookup_offers", "search_flights", "save_search", "save_offers"]
+    params = build_search_params(_search_state())
+    assert tools.calls[1][1] == params
+    assert tools.calls[2][1] == {
+        "trip_id": "trip-1", "provider": "flight_tool", "params_json": params, "query_hash": query_hash(params),
+    }
+    assert tools.calls[3][1] == {"search_id": "s-new", "offers": [{"offer_id": "live"}]}
+
+
+def test_search_hit_skips_flight_tool_and_does_not_restore_offers():
+    tools = _Tools({"hit": True, "search_id": "s-old", "offers": [{"offer_id": "stored"}]})
+    out = asyncio.run(search_persisted(tools, _search_state()))
+    assert out == {"search_id": "s-new", "flight_results": [{"offer_id": "stored"}]}
+    assert [name for name, _ in tools.calls] == ["lookup_offers", "save_search"]
+    assert tools.calls[1][1]["provider"] == "offer_memo"
+    assert tools.calls[1][1]["trip_id"] == "trip-1"
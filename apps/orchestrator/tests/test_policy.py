@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from app.policy import AdmissionController, AdmissionRejected, parse_weights
+
+
+def _controller(**kw):
+    kw.setdefault("max_concurrent", 1)
+    kw.setdefault("max_queue_wait_s", 5.0)
+    return AdmissionController(**kw)
+
+
+def test_fast_path_admits_without_queueing():
+    ac = _controller(max_concurrent=2)
+
+    async def run():
+        await ac.acquire("a")
+        await ac.acquire("b")
+
+    asyncio.run(run())
+    assert ac.in_flight == 2 and ac.admitted == 2
+    assert ac.metrics()["queue_depth"] == 0
+
+
+def _admission_order(ac, requests):
+    """Fill the single slot, queue `requests` (tenant names) and record the order they are admitted in."""
+    order = []
+
+    async def waiter(tenant):
+        await ac.acquire(tenant)
+        order.append(tenant)
+
+    async def run():
+        await ac.acquire("holder")
+        tasks = [asyncio.create_task(waiter(t)) for t in requests]
+        await asyncio.sleep(0)
+        for _ in requests:
+            ac.release(0.01)
+            await asyncio.sleep(0)
+        ac.release(0.01)
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    return order
+
+
+def test_tenants_interleave_fairly_however_many_each_queues():
+    order = _admission_order(_controller(), ["a"] * 6 + ["b"] * 2)
+    assert order[:4] == ["a", "b", "a", "b"]
+
+
+def test_weights_give_proportional_share():
+    ac = _controller(weights=parse_weights("gold:=2,free:=1"))
+    order = _admission_order(ac, ["gold:1"] * 6 + ["free:1"] * 6)
+    first_six = order[:6]
+    assert first_six.count("gold:1") == 4 and first_six.count("free:1") == 2
+
+
+def test_predicted_wait_sheds_up_front():
+    ac = _controller(max_queue_wait_s=1.0)
+
+    async def run():
+        await ac.acquire("a")
+        ac.release(2.0)  # learn a 2s service time
+        await ac.acquire("a")
+        with pytest.raises(AdmissionRejected) as exc:
+            await ac.acquire("b")
+        return exc.value
+
+    rejected = asyncio.run(run())
+    assert rejected.reason == "predicted_wait"
+    assert rejected.retry_after_s == 2
+    assert ac.shed["predicted_wait"] == 1 and ac.metrics()["queue_depth"] == 0
+
+
+def test_queue_full_and_queue_timeout():
+    ac = _controller(max_queue=1, max_queue_wait_s=0.05)
+
+    async def run():
+        await ac.acquire("a")
+        waiter = asyncio.create_task(ac.acquire("b"))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            await ac.acquire("c")
+        with pytest.raises(AdmissionRejected) as timeout:
+            await waiter
+        return full.value, timeout.value
+
+    full, timeout = asyncio.run(run())
+    assert (full.reason, timeout.reason) == ("queue_full", "queue_timeout")
+    assert ac.metrics()["queue_depth"] == 0
+    assert ac.in_flight == 1
+
+
+def test_cancelled_waiter_is_skipped_and_its_place_released():
+    ac = _controller()
+
+    async def run():
+        await ac.acquire("holder")
+        gone = asyncio.create_task(ac.acquire("gone"))
+        stays = asyncio.create_task(ac.acquire("stays"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.sleep(0)
+        assert ac.metrics()["queue_depth_by_tenant"] == {"stays": 1}
+        ac.release()
+        await stays
+
+    asyncio.run(run())
+    assert ac.in_flight == 1 and ac.metrics()["queue_depth"] == 0
+
+
+def test_slot_granted_to_an_abandoning_waiter_is_handed_on():
+    ac = _controller()
+
+    async def run():
+        await ac.acquire("holder")
+        first = asyncio.create_task(ac.acquire("first"))
+        second = asyncio.create_task(ac.acquire("second"))
+        await asyncio.sleep(0)
+        ac.release()  # grants "first" ...
+        first.cancel()  # ... which gives up before it resumes
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await second
+
+    asyncio.run(run())
+    assert ac.in_flight == 1 and ac.metrics()["queue_depth"] == 0
+
+
+def test_parse_weights():
+    assert parse_weights("sess:=1, ip:=0.5,bad") == {"sess:": 1.0, "ip:": 0.5}
+    ac = _controller(weights={"ip:": 0.5, "ip:10.": 3.0})
+    assert ac.weight("ip:10.0.0.1") == 3.0
+    assert ac.weight("ip:8.8.8.8") == 0.5
+    assert ac.weight("sess:x") == 1.0
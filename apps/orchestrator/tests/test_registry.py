@@ -0,0 +1,183 @@
+import asyncio
+import json
+
+import pytest
+
+for _dep in ("httpx", "pydantic_core", "structlog"):
+    pytest.importorskip(_dep)
+
+import httpx
+from travel_schemas.tool_schemas import SearchFlightsRequest, SearchFlightsResponse
+
+from app.registry import CompiledSchema, ContractError, ToolRegistryCache
+
+
+def _ok(schema, value):
+    CompiledSchema(schema).check(value)
+
+
+def _bad(schema, value) -> str:
+    with pytest.raises(ContractError) as exc:
+        CompiledSchema(schema).check(value)
+    return str(exc.value)
+
+
+NODE = {
+    "$defs": {
+        "Node": {
+            "type": "object",
+            "properties": {
+                "name": {"type": "string"},
+                "children": {"type": "array", "items": {"$ref": "#/$defs/Node"}},
+            },
+            "required": ["name"],
+        }
+    },
+    "$ref": "#/$defs/Node",
+}
+
+
+def test_ref_resolves_recursive_definitions():
+    _ok(NODE, {"name": "a", "children": [{"name": "b", "children": [{"name": "c"}]}]})
+    assert _bad(NODE, {"name": "a", "children": [{"children": []}]}) == "$.children[0].name: Field required"
+
+
+def test_any_of_nullable_and_unions():
+    nullable = {"anyOf": [{"type": "number"}, {"type": "null"}]}
+    _ok(nullable, None)
+    _ok(nullable, 1.5)
+    _bad(nullable, "1.5")
+    union = {"anyOf": [{"type": "integer"}, {"type": "string"}]}
+    _ok(union, 3)
+    _ok(union, "3")
+    _bad(union, [3])
+    _ok({"type": ["string", "null"]}, None)
+
+
+def test_types_are_strict():
+    _bad({"type": "integer"}, "1")
+    _bad({"type": "integer"}, True)
+    _bad({"type": "string"}, 1)
+    _bad({"type": "boolean"}, 1)
+    _ok({"type": "number"}, 1)  # JSON Schema integers are numbers
+
+
+def test_string_pattern_and_length():
+    date = {"type": "string", "pattern": r"^\d{4}-\d{2}-\d{2}$", "minLength": 10, "maxLength": 10}
+    _ok(date, "2025-06-15")
+    _bad(date, "15/06/2025")
+    _ok({"type": "string", "pattern": r"\d"}, "ab1")  # unanchored, like JSON Schema
+    _bad({"type": "string", "minLength": 2}, "a")
+    _bad({"type": "string", "maxLength": 2}, "abc")
+
+
+def test_numeric_and_array_bounds():
+    ttl = {"type": "integer", "minimum": 1, "maximum": 86400}
+    _ok(ttl, 1)
+    _ok(ttl, 86400)
+    _bad(ttl, 0)
+    _bad(ttl, 86401)
+    _bad({"type": "number", "exclusiveMinimum": 0}, 0)
+    _ok({"type": "number", "exclusiveMaximum": 1}, 0.5)
+    legs = {"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": 2}
+    _ok(legs, ["a"])
+    _bad(legs, [])
+    _bad(legs, ["a", "b", "c"])
+    _bad(legs, [1])
+
+
+def test_enum_const_and_additional_properties():
+    _ok({"enum": ["mock", "amadeus"]}, "mock")
+    _bad({"enum": ["mock", "amadeus"]}, "other")
+    _bad({"const": "v1"}, "v2")
+    closed = {"type": "object", "properties": {"a": {"type": "integer"}}, "additionalProperties": False}
+    _ok(closed, {"a": 1})
+    assert "extra" in _bad(closed, {"a": 1, "extra": 2}) or "Extra" in _bad(closed, {"a": 1, "extra": 2})
+    _ok({"type": "object", "properties": {"a": {"type": "integer"}}}, {"a": 1, "extra": 2})
+    _ok({"type": "object", "additionalProperties": True}, {"anything": [1, {"x": None}]})
+    _bad({"type": "object"}, [])
+
+
+def _search_response(n=50):
+    legs = [{"origin": "LHR", "destination": "DXB", "date": "2025-06-15"}]
+    flights = [
+        {"offer_id": f"m{i}", "airline": "EK", "price_total": 300.0 + i, "currency": "USD",
+         "duration_minutes": 400, "stops": 0, "legs": legs, "source": "mock"}
+        for i in range(n)
+    ]
+    return {"flights": flights, "count": n}
+
+
+def test_tool_schemas_from_pydantic_models():
+    out = CompiledSchema(SearchFlightsResponse.model_json_schema())
+    data = _search_response()
+    out.check(data)
+    data["flights"][3]["source"] = "other"
+    with pytest.raises(ContractError, match=r"^\$\.flights\[3\]\.source: "):
+        out.check(data)
+    inp = CompiledSchema(SearchFlightsRequest.model_json_schema())
+    inp.check(SearchFlightsRequest(legs=[{"origin": "LHR", "destination": "DXB", "date": "2025-06-15"}]).model_dump())
+
+
+def test_parse_json_returns_what_json_loads_returns():
+    out = CompiledSchema(SearchFlightsResponse.model_json_schema())
+    raw = json.dumps(_search_response()).encode()
+    assert out.parse_json(raw) == json.loads(raw)
+    with pytest.raises(ContractError):
+        out.parse_json(b'{"flights": [], "count": "0"}')
+    with pytest.raises(ContractError):
+        out.parse_json(b"not json")
+
+
+# --- ToolRegistryCache revalidation ---
+
+REGISTRY = {"tools": [{
+    "name": "lookup_offers",
+    "description": "",
+    "input_schema": {"type": "object", "properties": {"query_hash": {"type": "string"}}, "required": ["query_hash"]},
+    "output_schema": {"type": "object"},
+    "timeout_ms": 1000,
+}]}
+
+
+def test_registry_is_revalidated_with_if_none_match():
+    seen = []
+
+    def handler(request):
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, json=REGISTRY, headers={"ETag": '"v1"'})
+
+    cache = ToolRegistryCache(["http://db_tool"])
+    updates = []
+    cache.on_update = lambda c: updates.append((c.name, c.timeout_ms))
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            await cache.refresh(client)
+            first = cache.get("lookup_offers")
+            await cache.refresh(client)
+            return first
+
+    first = asyncio.run(run())
+    assert seen == [None, '"v1"']
+    assert updates == [("lookup_offers", 1000)]
+    assert cache.get("lookup_offers") is first
+    first.check_input({"query_hash": "h"})
+    with pytest.raises(ContractError):
+        first.check_input({})
+
+
+def test_failed_refresh_keeps_previous_contracts():
+    responses = [httpx.Response(200, json=REGISTRY, headers={"ETag": '"v1"'}), httpx.Response(500)]
+    cache = ToolRegistryCache(["http://db_tool"])
+
+    async def run():
+        transport = httpx.MockTransport(lambda request: responses.pop(0))
+        async with httpx.AsyncClient(transport=transport) as client:
+            await cache.refresh(client)
+            await cache.refresh(client)
+
+    asyncio.run(run())
+    assert cache.get("lookup_offers") is not None
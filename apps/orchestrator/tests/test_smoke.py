@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+for _dep in ("fastapi", "httpx", "pydantic", "redis", "structlog"):
+    pytest.importorskip(_dep)
+
+ORCHESTRATOR_DIR = Path(__file__).resolve().parents[1]
+
+# Third-party packages app.main is built on; imported first so their cost is
+# measured separately from the service's own import path.
+FRAMEWORK_MODULES = ("fastapi", "httpx", "pydantic", "redis.asyncio", "structlog")
+
+# app.main's own import time, as a fraction of the frameworks' import time.
+# A ratio rather than milliseconds so it holds on slow and fast machines alike.
+IMPORT_BUDGET_RATIO = float(os.getenv("ORCHESTRATOR_IMPORT_BUDGET_RATIO", "0.5"))
+
+# Must only be imported on first use / by the background prewarm.
+LAZY_MODULES = ("langgraph", "langchain_core", "langchain_openai", "langchain_community")
+
+
+def _importtime(code: str) -> dict:
+    """Cumulative import time in microseconds for every module imported by `code`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ORCHESTRATOR_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    times = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        times[name.strip()] = int(cumulative.strip())
+    return times
+
+
+def test_heavy_integrations_are_not_imported_at_startup():
+    times = _importtime("import app.main")
+    loaded = sorted(m for m in times if m.split(".")[0] in LAZY_MODULES)
+    assert loaded == []
+
+
+def test_orchestrator_import_cost_relative_to_frameworks():
+    times = _importtime(f"import {', '.join(FRAMEWORK_MODULES)}; import app.main")
+    frameworks = sum(times[m] for m in FRAMEWORK_MODULES if m in times)
+    assert times["app.main"] <= IMPORT_BUDGET_RATIO * frameworks, (times["app.main"], frameworks)
@@ -0,0 +1,208 @@
+import asyncio
+
+import pytest
+
+for _dep in ("fastapi", "httpx", "redis", "structlog"):
+    pytest.importorskip(_dep)
+
+import httpx
+from fastapi import HTTPException
+
+from app import main
+from app.tool_router import LatencyWindow, ToolRouter, hedged
+
+
+# --- LatencyWindow / ToolRouter ---
+
+def test_quantile_is_nearest_rank():
+    w = LatencyWindow(100)
+    for ms in range(1, 101):
+        w.add(ms)
+    assert w.quantile(0.5) == 50
+    assert w.quantile(0.99) == 99
+    assert w.quantile(1.0) == 100
+    assert w.quantile(0.0) == 1
+
+
+def test_window_keeps_only_the_newest_samples():
+    w = LatencyWindow(3)
+    for ms in (500, 1, 2, 3):
+        w.add(ms)
+    assert len(w) == 3
+    assert w.quantile(1.0) == 3
+
+
+def test_timeout_uses_caller_default_until_min_samples():
+    router = ToolRouter(min_samples=5, ceilings_ms={"get_trip": 5000})
+    assert router.timeout_s("get_trip", 2.0) == 2.0
+    assert router.timeout_s("get_trip", 9.0) == 5.0  # capped at the registry timeout
+
+
+def test_timeout_is_p99_times_k_clamped_to_floor_and_ceiling():
+    router = ToolRouter(min_samples=5, k=3.0, floor_ms=50, ceilings_ms={"get_trip": 1000})
+    for _ in range(5):
+        router.record("get_trip", 10)
+    assert router.timeout_s("get_trip", 2.0) == 0.05  # 30ms raised to the floor
+    for _ in range(5):
+        router.record("get_trip", 100)
+    assert router.timeout_s("get_trip", 2.0) == pytest.approx(0.3)
+    for _ in range(5):
+        router.record("get_trip", 900)
+    assert router.timeout_s("get_trip", 2.0) == 1.0  # capped at the ceiling
+
+
+def test_timeouts_grow_after_a_slowdown():
+    router = ToolRouter(window_size=200, min_samples=20, k=3.0, floor_ms=50, ceilings_ms={"get_trip": 5000})
+    for _ in range(50):
+        router.record("get_trip", 10)
+    timeout_s = router.timeout_s("get_trip", 5.0)
+    assert timeout_s == 0.05
+    router.record_timeout("get_trip", timeout_s)
+    assert router.timeout_s("get_trip", 5.0) == pytest.approx(0.15)  # the 80ms call now fits
+
+
+def test_hedge_delay_only_for_read_only_tools_when_enabled():
+    router = ToolRouter(min_samples=1, hedging=True)
+    router.record("get_trip", 40)
+    router.record("save_trip", 40)
+    assert router.hedge_delay_s("get_trip") == 0.04
+    assert router.hedge_delay_s("save_trip") is None
+    assert ToolRouter(min_samples=1).hedge_delay_s("get_trip") is None
+
+
+# --- hedged ---
+
+class _Attempts:
+    """Attempt n sleeps delays[n] and then returns n (or raises errors[n])."""
+
+    def __init__(self, delays, errors=None):
+        self.delays = delays
+        self.errors = errors or {}
+        self.started = 0
+        self.cancelled = []
+
+    async def __call__(self):
+        n = self.started
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delays[n])
+        except asyncio.CancelledError:
+            self.cancelled.append(n)
+            raise
+        if n in self.errors:
+            raise self.errors[n]
+        return n
+
+
+def test_no_hedge_when_first_attempt_is_fast():
+    attempts = _Attempts([0.0, 0.0])
+    assert asyncio.run(hedged(attempts, 0.05)) == 0
+    assert attempts.started == 1
+
+
+def test_hedge_wins_and_slow_attempt_is_cancelled():
+    attempts = _Attempts([1.0, 0.01])
+    assert asyncio.run(hedged(attempts, 0.01)) == 1
+    assert attempts.cancelled == [0]
+
+
+def test_failed_attempt_falls_back_to_the_other():
+    attempts = _Attempts([0.05, 0.0], errors={1: RuntimeError("boom")})
+    assert asyncio.run(hedged(attempts, 0.01)) == 0
+
+
+def test_last_error_is_raised_when_every_attempt_fails():
+    attempts = _Attempts([0.02, 0.0], errors={0: RuntimeError("a"), 1: RuntimeError("b")})
+    with pytest.raises(RuntimeError):
+        asyncio.run(hedged(attempts, 0.01))
+
+
+def test_outer_cancellation_cancels_both_attempts():
+    attempts = _Attempts([1.0, 1.0])
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(hedged(attempts, 0.01), timeout=0.05)
+
+    asyncio.run(run())
+    assert sorted(attempts.cancelled) == [0, 1]
+
+
+# --- _tool_post: one breaker outcome per logical call ---
+
+class _Breaker:
+    def __init__(self):
+        self.events = []
+
+    async def allow(self, tool):
+        self.events.append("allow")
+        return True, "closed"
+
+    async def on_success(self, tool):
+        self.events.append("success")
+
+    async def on_failure(self, tool):
+        self.events.append("failure")
+
+    async def state(self, tool):
+        return "closed"
+
+
+class _NoContracts:
+    def get(self, tool):
+        return None
+
+
+@pytest.fixture
+def tool_server(monkeypatch):
+    """Mock tool server; request n sleeps delays[n] (the last delay repeats)."""
+    server = {"delays": [0.0], "requests": 0}
+
+    async def handler(request):
+        n = server["requests"]
+        server["requests"] += 1
+        await asyncio.sleep(server["delays"][min(n, len(server["delays"]) - 1)])
+        return httpx.Response(200, json={"n": n})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        main.httpx, "AsyncClient",
+        lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+    )
+    breaker = _Breaker()
+    monkeypatch.setattr(main.app.state, "cbreaker", breaker, raising=False)
+    monkeypatch.setattr(main.app.state, "registry", _NoContracts(), raising=False)
+    server["breaker"] = breaker
+    return server
+
+
+def _call(tool="get_trip", timeout_s=2.0):
+    return asyncio.run(main._tool_post(tool, "http://db_tool/tools/get_trip", {}, "t1", timeout_s))
+
+
+def test_hedged_call_reports_one_success_to_the_breaker(tool_server, monkeypatch):
+    router = ToolRouter(min_samples=1, hedging=True)
+    router.record("get_trip", 10)
+    monkeypatch.setattr(main.app.state, "tool_router", router, raising=False)
+    tool_server["delays"] = [0.5, 0.0]
+
+    assert _call() == {"n": 1}
+    assert tool_server["requests"] == 2
+    assert tool_server["breaker"].events == ["allow", "success"]
+
+
+def test_timed_out_call_reports_one_failure_and_raises_the_next_timeout(tool_server, monkeypatch):
+    router = ToolRouter(min_samples=20, k=3.0, floor_ms=50, ceilings_ms={"get_trip": 5000})
+    for _ in range(50):
+        router.record("get_trip", 10)
+    monkeypatch.setattr(main.app.state, "tool_router", router, raising=False)
+    tool_server["delays"] = [0.08]
+
+    with pytest.raises(HTTPException) as exc:
+        _call()
+    assert exc.value.status_code == 502
+    assert tool_server["breaker"].events == ["allow", "failure"]
+
+    assert router.timeout_s("get_trip", 5.0) > 0.08
+    assert _call() == {"n": 1}
+    assert tool_server["breaker"].events[-2:] == ["allow", "success"]
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("redis")
+
+from travel_schemas.tool_schemas import CACHE_WARMER_TRIP_ID
+
+from app.warmer import WARMER_PROVIDER, CacheWarmer
+
+PARAMS = {"legs": [{"origin": "LHR", "destination": "DXB", "date": "2025-06-15"}], "max_results": 10}
+
+
+class _Tools:
+    def __init__(self, popular):
+        self.popular = popular
+        self.calls = []
+
+    async def __call__(self, tool_name, url, payload, trace_id, timeout_s):
+        self.calls.append((tool_name, payload))
+        if tool_name == "popular_searches":
+            return {"searches": self.popular}
+        if tool_name == "search_flights":
+            return {"flights": [{"offer_id": "o1"}], "count": 1}
+        if tool_name == "save_search":
+            return {"search_id": "s-new"}
+        return {"ok": True}
+
+
+def _entry(query_hash, age_seconds, trip_id="user-trip"):
+    return {"query_hash": query_hash, "trip_id": trip_id, "params_json": PARAMS, "hits": 3, "age_seconds": age_seconds}
+
+
+def _warmer(tools, **kw):
+    return CacheWarmer(tools, r=None, flight_tool_url="http://flight", db_tool_url="http://db", ttl_s=900, lead_s=60, **kw)
+
+
+def test_refreshes_only_entries_close_to_expiry_into_the_internal_trip():
+    tools = _Tools([_entry("fresh", 100), _entry("stale", 850)])
+    assert asyncio.run(_warmer(tools).warm_once()) == 1
+
+    saved = [payload for name, payload in tools.calls if name == "save_search"]
+    assert saved == [{
+        "trip_id": CACHE_WARMER_TRIP_ID,
+        "provider": WARMER_PROVIDER,
+        "params_json": PARAMS,
+        "query_hash": "stale",
+    }]
+    assert all(payload.get("trip_id") != "user-trip" for _, payload in tools.calls)
+    assert ("save_offers", {"search_id": "s-new", "offers": [{"offer_id": "o1"}]}) in tools.calls
+
+
+def test_provider_budget_limits_refreshes_per_cycle():
+    tools = _Tools([_entry(f"h{i}", 900) for i in range(5)])
+    assert asyncio.run(_warmer(tools, calls_per_minute=2).warm_once()) == 2
+
+
+def test_query_without_stored_offers_is_refreshed():
+    tools = _Tools([_entry("never-stored", None)])
+    assert asyncio.run(_warmer(tools).warm_once()) == 1
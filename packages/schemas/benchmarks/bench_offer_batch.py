@@ -0,0 +1,109 @@
+"""
+OfferBatch vs List[FlightOffer] on flight_tool's search_flights response path.
+
+Both sides start from the same rows and end with the JSON body:
+
+    models: FlightOffer per row (sharing the request's TripLeg list, as the
+            endpoint does) -> SearchFlightsResponse -> model_dump_json()
+    batch:  OfferBatch.append per row -> to_dicts() -> pydantic_core.to_json()
+
+The models figure is a lower bound: FastAPI additionally re-validates a
+returned model against response_model before serializing it.
+
+    python packages/schemas/benchmarks/bench_offer_batch.py [--offers 50] [--repeat 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import timeit
+import tracemalloc
+
+from pydantic_core import to_json
+
+from travel_schemas.models import FlightOffer, TripLeg
+from travel_schemas.offer_batch import OfferBatch
+from travel_schemas.tool_schemas import SearchFlightsResponse
+
+AIRLINES = ["AI", "EK", "BA", "LH"]
+LEGS = [TripLeg(origin="LHR", destination="DXB", date="2025-06-15")]
+
+
+def _rows(n: int):
+    return [
+        (f"inv_{i}", AIRLINES[i % 4], 250.0 + ((i * 7919) % 97) * 3.5, 420 + i * 15, i % 3)
+        for i in range(n)
+    ]
+
+
+def build_models(rows):
+    return [
+        FlightOffer(
+            offer_id=oid, airline=al, price_total=p, currency="USD",
+            duration_minutes=d, stops=s, legs=LEGS, source="mock",
+        )
+        for oid, al, p, d, s in rows
+    ]
+
+
+def build_batch(rows):
+    batch = OfferBatch()
+    for oid, al, p, d, s in rows:
+        batch.append(oid, al, p, d, s, LEGS)
+    return batch
+
+
+def models_response(rows) -> str:
+    flights = build_models(rows)
+    return SearchFlightsResponse(flights=flights, count=len(flights), cached=False).model_dump_json()
+
+
+def batch_response(rows) -> bytes:
+    batch = build_batch(rows)
+    return to_json({"flights": batch.to_dicts(), "count": len(batch), "cached": False})
+
+
+def _peak_bytes(fn) -> int:
+    gc.collect()
+    tracemalloc.start()
+    keep = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del keep
+    return peak
+
+
+def _us_per_op(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--offers", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=2000)
+    args = ap.parse_args()
+
+    rows = _rows(args.offers)
+    assert json.loads(models_response(rows)) == json.loads(batch_response(rows))
+    models = build_models(rows)
+    batch = build_batch(rows)
+    top = max(1, args.offers // 5)
+
+    cases = [
+        ("response   List[FlightOffer]", lambda: models_response(rows)),
+        ("response   OfferBatch", lambda: batch_response(rows)),
+        (f"top-{top}     List[FlightOffer]", lambda: sorted(models, key=lambda o: o.price_total)[:top]),
+        (f"top-{top}     OfferBatch", lambda: batch.top_n(top)),
+    ]
+    print(f"{args.offers} offers, {args.repeat} repetitions (best of 5)")
+    for name, fn in cases:
+        print(f"  {name:34s} {_us_per_op(fn, args.repeat):10.1f} us/op")
+
+    print("peak memory while building")
+    print(f"  {'List[FlightOffer]':34s} {_peak_bytes(lambda: build_models(rows)):10d} B")
+    print(f"  {'OfferBatch':34s} {_peak_bytes(lambda: build_batch(rows)):10d} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import pytest
+
+from travel_schemas.models import FlightOffer, TripLeg
+from travel_schemas.offer_batch import OfferBatch
+
+LEGS = [{"origin": "LHR", "destination": "DXB", "date": "2025-06-15"}]
+RETURN = LEGS + [{"origin": "DXB", "destination": "LHR", "date": "2025-06-22"}]
+
+
+def _dicts():
+    prices = [410.0, 250.5, 399.99, 250.5, 600.0, 120.0]
+    return [
+        {
+            "offer_id": f"o{i}", "airline": ["EK", "BA"][i % 2], "price_total": p, "currency": "USD",
+            "duration_minutes": 400 + 10 * (5 - i), "stops": i % 3,
+            "legs": RETURN if i == 4 else LEGS, "source": "mock",
+        }
+        for i, p in enumerate(prices)
+    ]
+
+
+@pytest.fixture
+def batch():
+    return OfferBatch.from_dicts(_dicts())
+
+
+def _ids(view):
+    return [r.offer_id for r in view]
+
+
+def test_round_trips_through_dicts_and_models(batch):
+    assert batch.to_dicts() == _dicts()
+    models = batch.to_models()
+    assert models == [FlightOffer(**d) for d in _dicts()]
+    assert OfferBatch.from_models(models).to_dicts() == _dicts()
+
+
+def test_identical_leg_lists_are_stored_once(batch):
+    assert len(batch._cols.leg_sets) == 2
+    models = batch.to_models()
+    assert models[0].legs[0] is models[1].legs[0]
+    assert isinstance(models[0].legs[0], TripLeg)
+
+
+def test_records_mirror_flight_offer_attributes(batch):
+    rec = batch[4]
+    assert (rec.offer_id, rec.price_total, rec.stops) == ("o4", 600.0, 1)
+    assert [leg.as_dict() for leg in rec.legs] == RETURN
+
+
+def test_slicing_returns_views(batch):
+    view = batch[1:4]
+    assert isinstance(view, OfferBatch) and len(view) == 3
+    assert _ids(view) == ["o1", "o2", "o3"]
+    assert _ids(view[::2]) == ["o1", "o3"]
+    assert view._cols is batch._cols
+    with pytest.raises(TypeError):
+        view.append("x", "EK", 1.0, 1, 0, LEGS)
+
+
+def test_sorted_by_is_stable_and_supports_reverse(batch):
+    assert _ids(batch.sorted_by("price_total")) == ["o5", "o1", "o3", "o2", "o0", "o4"]
+    assert _ids(batch.sorted_by("price_total", reverse=True))[0] == "o4"
+    assert _ids(batch.sorted_by("duration_minutes")) == ["o5", "o4", "o3", "o2", "o1", "o0"]
+    assert batch.sorted_by("stops")[0].stops == 0
+    with pytest.raises(ValueError):
+        batch.sorted_by("airline")
+
+
+def test_top_n_matches_a_full_sort(batch):
+    assert _ids(batch.top_n(3)) == ["o5", "o1", "o3"]
+    assert _ids(batch.top_n(10)) == _ids(batch.sorted_by())
+    assert _ids(batch[2:].top_n(2)) == ["o5", "o3"]
+
+
+def test_top_n_on_large_batches_uses_the_same_order():
+    big = OfferBatch()
+    for i in range(3000):
+        big.append(f"o{i}", "EK", float((i * 7919) % 1013), 400, 0, LEGS)
+    expected = _ids(big.sorted_by())[:25]
+    assert _ids(big.top_n(25)) == expected
+
+
+def test_views_convert_only_their_rows(batch):
+    top = batch.top_n(2)
+    assert [d["offer_id"] for d in top.to_dicts()] == ["o5", "o1"]
+    assert [m.offer_id for m in top.to_models()] == ["o5", "o1"]
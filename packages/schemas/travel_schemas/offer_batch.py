@@ -0,0 +1,237 @@
+"""
+Columnar container for flight offers.
+
+Hot paths build one OfferBatch instead of a list of FlightOffer models:
+scalars live in typed arrays, strings are interned, and identical leg lists
+(every offer of a search has the same legs) are stored once and referenced
+by index. Sorting, top-N and slicing return views that share the columns;
+only the row index is new. Convert with to_models() / to_dicts() at the
+API edge.
+"""
+from __future__ import annotations
+
+import heapq
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .models import FlightOffer, TripLeg
+
+
+class LegRef:
+    """Immutable, shared leg record."""
+
+    __slots__ = ("origin", "destination", "date")
+
+    def __init__(self, origin: str, destination: str, date: str):
+        self.origin = sys.intern(origin)
+        self.destination = sys.intern(destination)
+        self.date = sys.intern(date)
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"origin": self.origin, "destination": self.destination, "date": self.date}
+
+    def __repr__(self) -> str:
+        return f"LegRef({self.origin}->{self.destination} {self.date})"
+
+
+LegSet = Tuple[LegRef, ...]
+
+
+class _Columns:
+    __slots__ = (
+        "offer_id", "airline", "price_total", "currency", "duration_minutes",
+        "stops", "leg_set", "source", "leg_sets", "_leg_set_ids",
+    )
+
+    def __init__(self) -> None:
+        self.offer_id: List[str] = []
+        self.airline: List[str] = []
+        self.price_total = array("d")
+        self.currency: List[str] = []
+        self.duration_minutes = array("i")
+        self.stops = array("b")
+        self.leg_set = array("I")
+        self.source: List[str] = []
+        self.leg_sets: List[LegSet] = []
+        self._leg_set_ids: Dict[Tuple[Tuple[str, str, str], ...], int] = {}
+
+    def leg_set_id(self, legs: Iterable[Any]) -> int:
+        key = tuple(
+            (leg["origin"], leg["destination"], leg["date"]) if isinstance(leg, dict)
+            else (leg.origin, leg.destination, leg.date)
+            for leg in legs
+        )
+        idx = self._leg_set_ids.get(key)
+        if idx is None:
+            idx = self._leg_set_ids[key] = len(self.leg_sets)
+            self.leg_sets.append(tuple(LegRef(*k) for k in key))
+        return idx
+
+    def __len__(self) -> int:
+        return len(self.offer_id)
+
+
+class OfferRecord:
+    """Lightweight row view; attributes mirror FlightOffer."""
+
+    __slots__ = ("_cols", "_row")
+
+    def __init__(self, cols: _Columns, row: int):
+        self._cols = cols
+        self._row = row
+
+    offer_id = property(lambda self: self._cols.offer_id[self._row])
+    airline = property(lambda self: self._cols.airline[self._row])
+    price_total = property(lambda self: self._cols.price_total[self._row])
+    currency = property(lambda self: self._cols.currency[self._row])
+    duration_minutes = property(lambda self: self._cols.duration_minutes[self._row])
+    stops = property(lambda self: self._cols.stops[self._row])
+    source = property(lambda self: self._cols.source[self._row])
+    legs = property(lambda self: self._cols.leg_sets[self._cols.leg_set[self._row]])
+
+    def __repr__(self) -> str:
+        return f"OfferRecord({self.offer_id} {self.airline} {self.price_total} {self.currency})"
+
+
+_SORT_KEYS = ("price_total", "duration_minutes", "stops")
+_NSMALLEST_MIN_ROWS = 1024
+
+
+class OfferBatch:
+    """
+    A (view over a) set of offers. Append to a fresh batch, then sort / slice;
+    views share the underlying columns and must not be appended to.
+    """
+
+    __slots__ = ("_cols", "_rows")
+
+    def __init__(self, _cols: Optional[_Columns] = None, _rows: Union[range, memoryview, None] = None):
+        self._cols = _cols if _cols is not None else _Columns()
+        self._rows = _rows  # None = every row, in insertion order
+
+    # --- building ---
+
+    def append(
+        self,
+        offer_id: str,
+        airline: str,
+        price_total: float,
+        duration_minutes: int,
+        stops: int,
+        legs: Iterable[Any],
+        currency: str = "USD",
+        source: str = "mock",
+    ) -> None:
+        if self._rows is not None:
+            raise TypeError("cannot append to an OfferBatch view")
+        c = self._cols
+        c.offer_id.append(offer_id)
+        c.airline.append(sys.intern(airline))
+        c.price_total.append(price_total)
+        c.currency.append(sys.intern(currency))
+        c.duration_minutes.append(duration_minutes)
+        c.stops.append(stops)
+        c.leg_set.append(c.leg_set_id(legs))
+        c.source.append(sys.intern(source))
+
+    @classmethod
+    def from_models(cls, offers: Iterable[FlightOffer]) -> "OfferBatch":
+        batch = cls()
+        for o in offers:
+            batch.append(o.offer_id, o.airline, o.price_total, o.duration_minutes, o.stops,
+                         o.legs, o.currency, o.source)
+        return batch
+
+    @classmethod
+    def from_dicts(cls, offers: Iterable[Dict[str, Any]]) -> "OfferBatch":
+        batch = cls()
+        for o in offers:
+            batch.append(o["offer_id"], o["airline"], o["price_total"], o["duration_minutes"],
+                         o["stops"], o["legs"], o.get("currency", "USD"), o.get("source", "mock"))
+        return batch
+
+    # --- views ---
+
+    def _row_ids(self) -> Sequence[int]:
+        return range(len(self._cols)) if self._rows is None else self._rows
+
+    def __len__(self) -> int:
+        return len(self._row_ids())
+
+    def __iter__(self) -> Iterator[OfferRecord]:
+        cols = self._cols
+        for row in self._row_ids():
+            yield OfferRecord(cols, row)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[OfferRecord, "OfferBatch"]:
+        rows = self._row_ids()
+        if isinstance(key, slice):
+            return OfferBatch(self._cols, rows[key])  # range / memoryview slices do not copy
+        return OfferRecord(self._cols, rows[key])
+
+    def _view(self, row_ids: List[int]) -> "OfferBatch":
+        return OfferBatch(self._cols, memoryview(array("I", row_ids)))
+
+    def sorted_by(self, key: str = "price_total", reverse: bool = False) -> "OfferBatch":
+        if key not in _SORT_KEYS:
+            raise ValueError(f"sort key must be one of {_SORT_KEYS}")
+        col = getattr(self._cols, key)
+        return self._view(sorted(self._row_ids(), key=col.__getitem__, reverse=reverse))
+
+    def top_n(self, n: int, key: str = "price_total") -> "OfferBatch":
+        """The n smallest by `key`, as a view."""
+        if key not in _SORT_KEYS:
+            raise ValueError(f"sort key must be one of {_SORT_KEYS}")
+        col = getattr(self._cols, key)
+        rows = self._row_ids()
+        if len(rows) <= _NSMALLEST_MIN_ROWS:
+            # a C-level sort beats the heap for response-sized batches
+            return self._view(sorted(rows, key=col.__getitem__)[:n])
+        return self._view(heapq.nsmallest(n, rows, key=col.__getitem__))
+
+    # --- API edge ---
+
+    def to_models(self) -> List[FlightOffer]:
+        """FlightOffer models; each distinct leg list becomes TripLeg models once and is shared."""
+        c = self._cols
+        legs_cache: Dict[int, List[TripLeg]] = {}
+        out = []
+        for row in self._row_ids():
+            ls = c.leg_set[row]
+            legs = legs_cache.get(ls)
+            if legs is None:
+                legs = legs_cache[ls] = [TripLeg(**leg.as_dict()) for leg in c.leg_sets[ls]]
+            out.append(FlightOffer(
+                offer_id=c.offer_id[row],
+                airline=c.airline[row],
+                price_total=c.price_total[row],
+                currency=c.currency[row],
+                duration_minutes=c.duration_minutes[row],
+                stops=c.stops[row],
+                legs=list(legs),
+                source=c.source[row],
+            ))
+        return out
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Plain dicts in the FlightOffer shape, e.g. for save_offers."""
+        c = self._cols
+        legs_cache: Dict[int, List[Dict[str, str]]] = {}
+        out = []
+        for row in self._row_ids():
+            ls = c.leg_set[row]
+            legs = legs_cache.get(ls)
+            if legs is None:
+                legs = legs_cache[ls] = [leg.as_dict() for leg in c.leg_sets[ls]]
+            out.append({
+                "offer_id": c.offer_id[row],
+                "airline": c.airline[row],
+                "price_total": c.price_total[row],
+                "currency": c.currency[row],
+                "duration_minutes": c.duration_minutes[row],
+                "stops": c.stops[row],
+                "legs": legs,
+                "source": c.source[row],
+            })
+        return out
@@ -52,6 +52,10 @@ class LogToolCallRequest(BaseModel):
     latency_ms: int
     status: str
 
+# Trip that owns searches stored by the orchestrator's cache warmer, so
+# refreshed results never show up in a user's trip. Created by db_tool at startup.
+CACHE_WARMER_TRIP_ID = "internal:cache_warmer"
+
 class SaveSearchRequest(BaseModel):
     trip_id: str
     provider: str
@@ -69,3 +73,78 @@ class GetTripResponse(BaseModel):
     trip: dict
     searches: List[dict]
     offers: List[dict]
+
+class OfferPage(BaseModel):
+    offers: List[dict]
+    next_cursor: Optional[str] = None
+
+class TraceStepPage(BaseModel):
+    trace_id: str
+    steps: List[dict]
+    next_cursor: Optional[str] = None
+
+class LookupOffersRequest(BaseModel):
+    query_hash: str
+    max_age_seconds: conint(ge=1, le=86400) = 900
+
+class LookupOffersResponse(BaseModel):
+    hit: bool
+    search_id: Optional[str] = None
+    created_at: Optional[str] = None
+    offers: List[dict] = Field(default_factory=list)
+
+class PopularSearchesRequest(BaseModel):
+    window_seconds: conint(ge=60, le=7 * 86400) = 3600
+    limit: conint(ge=1, le=500) = 20
+    exclude_provider: Optional[str] = Field(
+        default=None, description="searches stored under this provider do not count as demand"
+    )
+
+class PopularSearch(BaseModel):
+    query_hash: str
+    trip_id: str
+    params_json: dict
+    hits: int
+    # since the newest search of this query_hash with stored offers; None if there is none
+    age_seconds: Optional[int] = None
+
+class PopularSearchesResponse(BaseModel):
+    searches: List[PopularSearch]
+
+class FareCalendarRequest(BaseModel):
+    origin: str = Field(..., pattern=r"^[A-Z]{3}$")
+    destination: str = Field(..., pattern=r"^[A-Z]{3}$")
+    date_from: str = Field(..., description="YYYY-MM-DD, inclusive")
+    date_to: str = Field(..., description="YYYY-MM-DD, inclusive")
+    currency: str = "USD"
+
+class FareCalendarDay(BaseModel):
+    date: str
+    min_price: float
+    currency: str
+    offer_id: str
+    search_id: str
+    updated_at: str
+
+class FareCalendarResponse(BaseModel):
+    origin: str
+    destination: str
+    days: List[FareCalendarDay]
+
+class SaveProfileRequest(BaseModel):
+    trace_id: str
+    service: str
+    collapsed: str = Field(..., description="collapsed stacks: 'frame;frame;frame count' per line")
+    samples: int
+    duration_ms: int
+
+class ProfileEntry(BaseModel):
+    service: str
+    samples: int
+    duration_ms: int
+    collapsed: str
+    created_at: str
+
+class GetProfileResponse(BaseModel):
+    trace_id: str
+    profiles: List[ProfileEntry]
@@ -1,32 +1,218 @@
+import atexit
+import copy
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
-from typing import Optional
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
 
+import structlog
+from structlog.contextvars import bind_contextvars, bound_contextvars, clear_contextvars, get_contextvars
+
+__all__ = [
+    "configure_logging",
+    "get_logger",
+    "bind_contextvars",
+    "bound_contextvars",
+    "clear_contextvars",
+    "dropped_records",
+]
 
 _LOGGING_CONFIGURED = False
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+_QUEUE_HANDLER: Optional["_NonBlockingQueueHandler"] = None
 
 
-def configure_logging(level: str = "INFO") -> None:
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without ever blocking the caller.
+    When the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, q: "queue.Queue[logging.LogRecord]"):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # structlog records carry the event dict in msg (context already merged)
+        # and are rendered by the writer. Plain stdlib records are resolved here,
+        # on the caller's thread, so mutable args cannot change before the writer
+        # formats them; the caller's bound context (trace_id) is captured with
+        # them since the writer thread has none.
+        if isinstance(record.msg, dict):
+            return record
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.structlog_context = get_contextvars()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _merge_record_context(logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """foreign_pre_chain counterpart of merge_contextvars for stdlib records."""
+    record = event_dict.get("_record")
+    for key, value in (getattr(record, "structlog_context", None) or {}).items():
+        event_dict.setdefault(key, value)
+    return event_dict
+
+
+def _parse_event_map(spec: str) -> Dict[str, float]:
+    """`"search_flights=0.1,db_initialized=1"` -> {"search_flights": 0.1, ...}"""
+    out: Dict[str, float] = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            out[name.strip()] = float(value)
+    return out
+
+
+class _EventGate:
+    """
+    structlog processor applying per-event sampling and per-second rate caps.
+    Events are keyed by the first word of the event string, so
+    "tool_call_failed tool=%s ..." and "tool_call_failed" share a budget.
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, sample_rates: Dict[str, float], rate_caps: Dict[str, float]):
+        self.sample_rates = sample_rates
+        self.rate_caps = rate_caps
+        self._windows: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, logger: Any, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        if method_name in ("warning", "error", "critical", "exception"):
+            return event_dict
+        event = str(event_dict.get("event", "")).split(" ", 1)[0]
+
+        rate = self.sample_rates.get(event)
+        if rate is not None and random.random() >= rate:
+            raise structlog.DropEvent
+
+        cap = self.rate_caps.get(event)
+        if cap is not None:
+            now = int(time.monotonic())
+            with self._lock:
+                window = self._windows.setdefault(event, [now, 0])
+                if window[0] != now:
+                    window[0], window[1] = now, 0
+                window[1] += 1
+                if window[1] > cap:
+                    raise structlog.DropEvent
+        return event_dict
+
+
+# uvicorn's default LOGGING_CONFIG gives these synchronous stdout/stderr
+# handlers and propagate=False, which would bypass the queue
+_UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+def _route_to_root(names: Iterable[str]) -> None:
+    for name in names:
+        logger = logging.getLogger(name)
+        logger.handlers.clear()
+        logger.propagate = True
+
+
+def configure_logging(
+    level: str = "INFO",
+    sample_rates: Optional[Dict[str, float]] = None,
+    rate_caps: Optional[Dict[str, float]] = None,
+    queue_size: Optional[int] = None,
+) -> None:
     """
     Configure structured logging once per process.
     Safe to call multiple times.
+
+    Log calls only render the event and enqueue it; a background thread writes
+    JSON lines to stdout. Context bound with bind_contextvars / bound_contextvars
+    (e.g. trace_id) is added to every event. Sampling and rate caps default to
+    LOG_SAMPLE_RATES / LOG_RATE_CAPS ("event=value,...").
     """
-    global _LOGGING_CONFIGURED
+    global _LOGGING_CONFIGURED, _LISTENER, _QUEUE_HANDLER
+    # uvicorn installs its own handlers before the app is imported; redo this
+    # on every call so a late uvicorn dictConfig cannot reattach them
+    _route_to_root(_UVICORN_LOGGERS)
     if _LOGGING_CONFIGURED:
         return
 
-    logging.basicConfig(
-        level=getattr(logging, level.upper(), logging.INFO),
-        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
-        stream=sys.stdout,
+    if sample_rates is None:
+        sample_rates = _parse_event_map(os.getenv("LOG_SAMPLE_RATES", ""))
+    if rate_caps is None:
+        rate_caps = _parse_event_map(os.getenv("LOG_RATE_CAPS", ""))
+    if queue_size is None:
+        queue_size = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+    timestamper = structlog.processors.TimeStamper(fmt="iso", utc=True)
+
+    structlog.configure(
+        processors=[
+            structlog.stdlib.filter_by_level,
+            _EventGate(sample_rates, rate_caps),
+            structlog.contextvars.merge_contextvars,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.add_logger_name,
+            timestamper,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.StackInfoRenderer(),
+            # tracebacks must be captured on the calling thread
+            structlog.processors.format_exc_info,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.processors.format_exc_info,
+                structlog.processors.JSONRenderer(),
+            ],
+            # records from plain stdlib loggers (uvicorn, httpx, ...)
+            foreign_pre_chain=[
+                _merge_record_context,
+                structlog.stdlib.add_log_level,
+                structlog.stdlib.add_logger_name,
+                timestamper,
+            ],
+        )
     )
 
+    _QUEUE_HANDLER = _NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    root = logging.getLogger()
+    root.handlers[:] = [_QUEUE_HANDLER]
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    _LISTENER = logging.handlers.QueueListener(_QUEUE_HANDLER.queue, writer, respect_handler_level=False)
+    _LISTENER.start()
+    atexit.register(_LISTENER.stop)  # flush what is queued on shutdown
+
     _LOGGING_CONFIGURED = True
 
 
-def get_logger(name: Optional[str] = None) -> logging.Logger:
+def dropped_records() -> int:
+    """Records discarded because the writer could not keep up."""
+    return _QUEUE_HANDLER.dropped if _QUEUE_HANDLER is not None else 0
+
+
+def get_logger(name: Optional[str] = None) -> structlog.stdlib.BoundLogger:
     """
-    Get a named logger.
-    If name is None, returns root logger.
+    Get a named structured logger.
+    Accepts both `log.info("event", key=value)` and `log.info("msg %s", arg)`.
+    If name is None, returns the root logger.
     """
-    return logging.getLogger(name)
+    return structlog.stdlib.get_logger(name)
@@ -0,0 +1,226 @@
+"""
+Opt-in per-request sampling profiler.
+
+A request is profiled when it is picked by PROFILE_SAMPLE_RATE or, on
+services that set PROFILE_ALLOW_HEADER=1, when it carries `x-profile: 1`.
+Only enable the header on services that untrusted clients cannot reach
+(the internal tool servers), since a profile samples every thread of the
+process. While a request is profiled, a background thread samples the Python
+stacks every PROFILE_INTERVAL_MS and aggregates them in collapsed-stack
+format ("frame;frame;frame count" per line, as consumed by flamegraph.pl /
+speedscope). The result is handed to a sink keyed by trace_id.
+
+The middleware is plain ASGI: requests that are not profiled cost one call
+frame (plus a header scan where the header is allowed).
+
+Samples cover every busy thread of the process, so work from concurrent
+requests can show up in a profile; idle pool workers are skipped.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = "x-profile"
+TRACE_HEADER = "x-trace-id"
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_ALLOW_HEADER = os.getenv("PROFILE_ALLOW_HEADER", "0") == "1"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_DEPTH = 64
+
+# leaf frames of threads parked with nothing to do
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+@dataclass
+class Profile:
+    trace_id: Optional[str]
+    service: str
+    collapsed: str
+    samples: int
+    duration_ms: int
+
+
+class _Session:
+    __slots__ = ("trace_id",)
+
+    def __init__(self, trace_id: Optional[str]):
+        self.trace_id = trace_id
+
+
+_session: ContextVar[Optional[_Session]] = ContextVar("profile_session", default=None)
+
+
+def is_profiling() -> bool:
+    """True inside a profiled request; callers forward `x-profile: 1` downstream."""
+    return _session.get() is not None
+
+
+def set_profile_trace_id(trace_id: str) -> None:
+    """Attach the trace_id to the current profile when it is only known inside the handler."""
+    session = _session.get()
+    if session is not None:
+        session.trace_id = trace_id
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(self, interval_s: float, root_thread_id: int):
+        self.interval_s = interval_s
+        self.root_thread_id = root_thread_id
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> int:
+        """Stop sampling; returns the profiled wall time in ms."""
+        self._stop.set()
+        self._thread.join()
+        return int((time.perf_counter() - self._started) * 1000)
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        while not self._stop.wait(self.interval_s):
+            self.samples += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                leaf = (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name)
+                if tid != self.root_thread_id and leaf in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < PROFILE_MAX_DEPTH:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if tid not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack.append(names.get(tid, f"thread-{tid}"))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+Sink = Callable[[Profile], Awaitable[None]]
+
+
+_PROFILE_HEADER_KEY = PROFILE_HEADER.encode("latin-1")
+_TRACE_HEADER_KEY = TRACE_HEADER.encode("latin-1")
+
+# deliveries in flight; the loop only keeps weak references to tasks
+_pending_deliveries: Set["asyncio.Task[None]"] = set()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests selected by sampling or the x-profile header."""
+
+    def __init__(
+        self,
+        app: Any,
+        service: str,
+        sink: Sink,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        allow_header: bool = PROFILE_ALLOW_HEADER,
+    ):
+        self.app = app
+        self.service = service
+        self.sink = sink
+        self.sample_rate = sample_rate
+        self.allow_header = allow_header
+
+    def _selected(self, headers: list) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.allow_header:
+            return (_PROFILE_HEADER_KEY, b"1") in headers
+        return False
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not self._selected(scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = next((v.decode("latin-1") for k, v in scope["headers"] if k == _TRACE_HEADER_KEY), None)
+        session = _Session(trace_id)
+        token = _session.set(session)
+        profiler = SamplingProfiler(PROFILE_INTERVAL_MS / 1000, threading.get_ident())
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            duration_ms = await asyncio.to_thread(profiler.stop)
+            _session.reset(token)
+            profile = Profile(session.trace_id, self.service, profiler.collapsed(), profiler.samples, duration_ms)
+            if profile.trace_id and profile.samples:
+                task = asyncio.get_running_loop().create_task(_deliver(self.sink, profile))
+                _pending_deliveries.add(task)
+                task.add_done_callback(_pending_deliveries.discard)
+
+
+def install_profiling(app: Any, service: str, sink: Sink) -> None:
+    """Add ProfilingMiddleware to a FastAPI/Starlette app."""
+    app.add_middleware(ProfilingMiddleware, service=service, sink=sink)
+
+
+async def _deliver(sink: Sink, profile: Profile) -> None:
+    try:
+        await sink(profile)
+    except Exception as e:
+        logger.warning("profile_store_failed trace_id=%s err=%s", profile.trace_id, repr(e))
+
+
+def http_sink(db_tool_url: str, timeout_s: float = 2.0) -> Sink:
+    """Sink posting profiles to db_tool's save_profile tool (stdlib HTTP, off the event loop)."""
+    url = f"{db_tool_url}/tools/save_profile"
+
+    def _post(body: bytes) -> None:
+        req = urllib.request.Request(url, data=body, headers={"content-type": "application/json"})
+        with urllib.request.urlopen(req, timeout=timeout_s) as resp:
+            resp.read()
+
+    async def _sink(profile: Profile) -> None:
+        body = json.dumps(_as_payload(profile)).encode("utf-8")
+        await asyncio.to_thread(_post, body)
+
+    return _sink
+
+
+def _as_payload(profile: Profile) -> Dict[str, Any]:
+    return {
+        "trace_id": profile.trace_id,
+        "service": profile.service,
+        "collapsed": profile.collapsed,
+        "samples": profile.samples,
+        "duration_ms": profile.duration_ms,
+    }
@@ -0,0 +1,20 @@
+from shared.http import etag_for, etag_matches
+
+
+def test_etag_is_quoted_and_content_addressed():
+    tag = etag_for(b"body")
+    assert tag.startswith('"') and tag.endswith('"')
+    assert tag == etag_for(b"body")
+    assert tag != etag_for(b"other body")
+
+
+def test_etag_matches():
+    tag = etag_for(b"body")
+    assert etag_matches(tag, tag)
+    assert etag_matches(f"W/{tag}", tag)
+    assert etag_matches(f'"a", {tag}', tag)
+    assert etag_matches("*", tag)
+    assert not etag_matches('"a", "b"', tag)
+    assert not etag_matches(tag.strip('"'), tag)
+    assert not etag_matches(None, tag)
+    assert not etag_matches("", tag)
@@ -0,0 +1,96 @@
+import io
+import json
+import logging
+import logging.config
+import queue
+
+import pytest
+
+structlog = pytest.importorskip("structlog")
+
+from shared import logging as shared_logging
+from shared.logging import _EventGate, _NonBlockingQueueHandler, bound_contextvars, configure_logging, get_logger
+
+
+def _record(msg="hello %s", args=("world",)):
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+
+
+def test_full_queue_drops_and_counts_instead_of_blocking():
+    handler = _NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.emit(_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_stdlib_records_are_resolved_on_the_calling_thread():
+    handler = _NonBlockingQueueHandler(queue.Queue())
+    args = ["before"]
+    with bound_contextvars(trace_id="t-1"):
+        handler.emit(_record("value=%s", (args,)))
+    args[0] = "after"
+    record = handler.queue.get_nowait()
+    assert record.msg == "value=['before']" and record.args is None
+    assert record.structlog_context == {"trace_id": "t-1"}
+
+
+def test_sampling_drops_info_but_never_warnings():
+    gate = _EventGate({"search_flights": 0.0}, {})
+    with pytest.raises(structlog.DropEvent):
+        gate(None, "info", {"event": "search_flights origin=LHR"})
+    assert gate(None, "warning", {"event": "search_flights"}) == {"event": "search_flights"}
+    assert gate(None, "info", {"event": "other"}) == {"event": "other"}
+
+
+def test_rate_cap_applies_per_second(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(shared_logging.time, "monotonic", lambda: now[0])
+    gate = _EventGate({}, {"tool_call": 2})
+    gate(None, "info", {"event": "tool_call"})
+    gate(None, "info", {"event": "tool_call a=1"})
+    with pytest.raises(structlog.DropEvent):
+        gate(None, "info", {"event": "tool_call"})
+    now[0] = 101.0
+    gate(None, "info", {"event": "tool_call"})
+
+
+def test_trace_id_is_bound_on_structlog_and_stdlib_records():
+    configure_logging("INFO")
+    out = io.StringIO()
+    listener = shared_logging._LISTENER
+    listener.handlers[0].setStream(out)
+
+    with bound_contextvars(trace_id="t-42"):
+        get_logger("svc").info("tool_call tool=%s", "get_trip")
+        logging.getLogger("httpx").info("HTTP Request: %s", "POST /tools/get_trip")
+    get_logger("svc").info("unbound")
+    listener.queue.join()
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    by_event = {line["event"]: line for line in lines}
+    assert by_event["tool_call tool=get_trip"]["trace_id"] == "t-42"
+    assert by_event["HTTP Request: POST /tools/get_trip"]["trace_id"] == "t-42"
+    assert by_event["HTTP Request: POST /tools/get_trip"]["logger"] == "httpx"
+    assert "trace_id" not in by_event["unbound"]
+
+
+def test_uvicorn_loggers_go_through_the_queue():
+    uvicorn_config = pytest.importorskip("uvicorn.config")
+    logging.config.dictConfig(uvicorn_config.LOGGING_CONFIG)  # what `uvicorn app.main:app` applies first
+    configure_logging("INFO")
+
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger = logging.getLogger(name)
+        assert logger.handlers == [] and logger.propagate, name
+
+    out = io.StringIO()
+    listener = shared_logging._LISTENER
+    listener.handlers[0].setStream(out)
+    with bound_contextvars(trace_id="t-7"):
+        logging.getLogger("uvicorn.access").info('%s - "%s %s HTTP/%s" %d', "1.2.3.4", "GET", "/health", "1.1", 200)
+    listener.queue.join()
+
+    line = json.loads(out.getvalue().splitlines()[-1])
+    assert line["logger"] == "uvicorn.access"
+    assert line["trace_id"] == "t-7"
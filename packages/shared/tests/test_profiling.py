@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from shared import profiling
+from shared.profiling import Profile, ProfilingMiddleware, is_profiling
+
+
+def _client(received, **kwargs):
+    async def sink(profile: Profile) -> None:
+        received.append(profile)
+
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, service="test", sink=sink, **kwargs)
+
+    @app.get("/work")
+    def work():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+        return {"ok": True}
+
+    @app.get("/flag")
+    async def flag():
+        return {"profiling": is_profiling()}
+
+    return TestClient(app)
+
+
+def test_header_ignored_unless_allowed():
+    received = []
+    with _client(received, sample_rate=0, allow_header=False) as client:
+        assert client.get("/flag", headers={"x-profile": "1"}).json() == {"profiling": False}
+        client.get("/work", headers={"x-profile": "1", "x-trace-id": "t1"})
+    assert received == []
+
+
+def test_header_is_off_by_default():
+    assert profiling.PROFILE_ALLOW_HEADER is False
+
+
+def test_allowed_header_profiles_request_and_delivers():
+    received = []
+    with _client(received, sample_rate=0, allow_header=True) as client:
+        assert client.get("/flag", headers={"x-profile": "1"}).json() == {"profiling": True}
+        assert client.get("/flag").json() == {"profiling": False}
+        client.get("/work", headers={"x-profile": "1", "x-trace-id": "t1"})
+    assert [p.trace_id for p in received] == ["t1"]
+    profile = received[0]
+    assert profile.service == "test"
+    assert profile.samples > 0
+    assert "work" in profile.collapsed
+
+
+def test_sample_rate_profiles_without_header():
+    received = []
+    with _client(received, sample_rate=1.0, allow_header=False) as client:
+        assert client.get("/flag").json() == {"profiling": True}
+
+
+def test_delivery_task_is_retained_until_done():
+    release = asyncio.Event()
+    delivered = []
+
+    async def sink(profile: Profile) -> None:
+        await release.wait()
+        delivered.append(profile)
+
+    async def app(scope, receive, send):
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+
+    middleware = ProfilingMiddleware(app, service="test", sink=sink, sample_rate=0, allow_header=True)
+    scope = {"type": "http", "headers": [(b"x-profile", b"1"), (b"x-trace-id", b"t1")]}
+
+    async def run():
+        await middleware(scope, None, None)
+        assert len(profiling._pending_deliveries) == 1
+        release.set()
+        await asyncio.gather(*profiling._pending_deliveries)
+        await asyncio.sleep(0)
+        assert not profiling._pending_deliveries
+
+    asyncio.run(run())
+    assert [p.trace_id for p in delivered] == ["t1"]